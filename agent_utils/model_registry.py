@@ -0,0 +1,88 @@
+import os
+import threading
+
+DEFAULT_MODEL = "PleIAs/Pleias-RAG-1B"
+
+# Process-wide: Streamlit sessions share imported modules, so each model loads once per server
+_models = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+class LoadedModel:
+    def __init__(self, name, tokenizer, model, generator, quantized):
+        self.name = name
+        self.tokenizer = tokenizer
+        self.model = model
+        self.generator = generator
+        self.quantized = quantized
+        self.prefix_caches = {}  # system prompt -> (token ids, KV cache)
+
+
+def set_num_threads(num_threads):
+    """Cap intra-op CPU threads used by torch (None leaves the default)."""
+    if num_threads:
+        import torch
+        torch.set_num_threads(int(num_threads))
+
+
+def _load(model_name, quantize):
+    import torch
+    from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(model_name)
+    model.eval()
+    if quantize:
+        # Dynamic int8 for Linear layers: smaller and usually faster for CPU decoding
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    generator = pipeline(
+        "text-generation",
+        model=model,
+        tokenizer=tokenizer,
+        device=-1
+    )
+    return LoadedModel(model_name, tokenizer, model, generator, quantize)
+
+
+def get_model(model_name=DEFAULT_MODEL, quantize=None, num_threads=None):
+    """
+    Load a model on first use and return the shared instance afterwards.
+    quantize / num_threads default to the RCM_QUANTIZE and RCM_NUM_THREADS env vars.
+    """
+    if quantize is None:
+        quantize = os.environ.get("RCM_QUANTIZE", "0") == "1"
+    set_num_threads(num_threads or os.environ.get("RCM_NUM_THREADS"))
+
+    key = (model_name, bool(quantize))
+    with _registry_lock:
+        if key in _models:
+            return _models[key]
+        lock = _locks.setdefault(key, threading.Lock())
+
+    # Per-model lock: concurrent sessions wait for one load instead of loading twice
+    with lock:
+        if key not in _models:
+            loaded = _load(model_name, quantize)
+            with _registry_lock:
+                _models[key] = loaded
+    return _models[key]
+
+
+def warm_up(model_names=(DEFAULT_MODEL,), quantize=None, num_threads=None, background=True):
+    """Optionally preload models at startup so the first request does not pay the load."""
+    def _run():
+        for name in model_names:
+            get_model(name, quantize=quantize, num_threads=num_threads)
+
+    if background:
+        thread = threading.Thread(target=_run, daemon=True)
+        thread.start()
+        return thread
+    _run()
+    return None
+
+
+def loaded_models():
+    with _registry_lock:
+        return list(_models)
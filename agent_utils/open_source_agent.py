@@ -1,42 +1,256 @@
+import copy
+import time
+import threading
 import pandas as pd
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
-import torch
+from agent_utils.model_registry import DEFAULT_MODEL, get_model
+from agent_utils.retrieval import ProspectIndex, serialize_row
+
+# The model tends to continue with a new turn after answering
+DEFAULT_STOP_SEQUENCES = ("\nQuery:", "\nSystem:", "\nSources:")
 
 class OpenSourceAgent:
-    def __init__(self, system_message, data=None, model_name="PleIAs/Pleias-RAG-1B"):
+    def __init__(self, system_message, data=None, model_name=DEFAULT_MODEL, quantize=None, num_threads=None,
+                 retriever=None, top_k=3):
         self.system_message = system_message
         self.data = data  # DataFrame or other context for RAG
+        self.retriever = retriever  # ProspectIndex over `data`; built on first query if not supplied
+        self.top_k = top_k
         self.model_name = model_name
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(model_name)
-        self.generator = pipeline(
-            "text-generation",
-            model=self.model,
-            tokenizer=self.tokenizer,
-            device=-1
-        )
+        self.quantize = quantize
+        self.num_threads = num_threads
+        self._loaded = None
+        self.last_stats = {}  # timing for the most recent stream_response call
 
-    def generate_response(self, user_input):
-        # Prepare sources from the data (for RAG)
-        sources = []
-        if self.data is not None:
-            # For demonstration, use the first 3 rows as sources
-            for i, row in self.data.head(3).iterrows():
-                # Combine relevant fields into a text chunk
-                text = ", ".join([f"{col}: {row[col]}" for col in self.data.columns if pd.notna(row[col])])
-                sources.append({"text": text, "metadata": {"row": i}})
+    # Weights come from the process-wide registry and are only loaded on first use
+    def _get_loaded(self):
+        if self._loaded is None:
+            self._loaded = get_model(self.model_name, quantize=self.quantize, num_threads=self.num_threads)
+        return self._loaded
+
+    @property
+    def tokenizer(self):
+        return self._get_loaded().tokenizer
+
+    @property
+    def model(self):
+        return self._get_loaded().model
+
+    @property
+    def generator(self):
+        return self._get_loaded().generator
+
+    def retrieve_sources(self, query):
+        """Rows most relevant to the query, via the hybrid vector + BM25 index."""
+        if self.data is None:
+            return []
+        if self.retriever is None:
+            self.retriever = ProspectIndex()
+            self.retriever.update(self.data)
+        return self.retriever.search(query, k=self.top_k)
+
+    def system_prefix(self):
+        return f"System: {self.system_message}\n"
+
+    def build_prompt(self, user_input, sources=None):
+        if sources is None:
+            # Prepare sources from the data (for RAG)
+            sources = self.retrieve_sources(user_input)
 
         # Build the prompt in Pleias-RAG-1B style
-        prompt = f"System: {self.system_message}\n"
+        prompt = self.system_prefix()
         prompt += f"Query: {user_input}\n"
         if sources:
             prompt += "Sources:\n"
             for idx, src in enumerate(sources):
                 prompt += f"[{idx+1}] {src['text']}\n"
         prompt += "Answer:"
+        return prompt
+
+    def generate_response(self, user_input):
+        prompt = self.build_prompt(user_input)
 
         # Generate response
         output = self.generator(prompt, max_new_tokens=256, do_sample=True, temperature=0.7)[0]["generated_text"]
         # Extract only the answer part
         answer = output.split("Answer:", 1)[-1].strip()
-        return answer 
\ No newline at end of file
+        return answer
+
+    def generate_batch(self, template, rows, batch_size=8, max_new_tokens=200, temperature=0.7, on_batch=None):
+        """
+        Draft one message per DataFrame row. The template is filled from the row's columns
+        (e.g. "Write an intro email to {Dakota Account Name}"), the row itself is the source,
+        and prompts are generated in left-padded batches. on_batch(indices, answers)
+        is called after each batch; returns {row index: answer}.
+        """
+        import torch
+
+        # Decoder-only models must be padded on the left so every prompt ends where generation
+        # starts; pad on a private copy so the shared registry tokenizer is left as it was
+        tokenizer = copy.deepcopy(self.tokenizer)
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+
+        answers = {}
+        indices = list(rows.index)
+        for start in range(0, len(indices), batch_size):
+            chunk = indices[start:start + batch_size]
+            prompts = [
+                self.build_prompt(
+                    template.format_map(_RowFields(rows.loc[i])),
+                    sources=[{"text": serialize_row(rows.loc[i])}]
+                )
+                for i in chunk
+            ]
+            inputs = tokenizer(prompts, return_tensors="pt", padding=True)
+            with torch.no_grad():
+                output_ids = self.model.generate(
+                    **inputs,
+                    max_new_tokens=max_new_tokens,
+                    do_sample=True,
+                    temperature=temperature,
+                    pad_token_id=tokenizer.pad_token_id,
+                )
+            # Keep only the new tokens, as the pipeline's return_full_text=False does
+            outputs = tokenizer.batch_decode(output_ids[:, inputs.input_ids.shape[1]:], skip_special_tokens=True)
+            batch_answers = [_trim_answer(output) for output in outputs]
+            answers.update(zip(chunk, batch_answers))
+            if on_batch:
+                on_batch(chunk, batch_answers)
+        return answers
+
+    def _prefix_cache(self, input_ids):
+        """KV cache for the shared system prompt, computed once per model and system message."""
+        import torch
+        from transformers import DynamicCache
+
+        loaded = self._get_loaded()
+        prefix = self.system_prefix()
+        if prefix not in loaded.prefix_caches:
+            prefix_ids = self.tokenizer(prefix, return_tensors="pt").input_ids
+            with torch.no_grad():
+                cache = self.model(prefix_ids, past_key_values=DynamicCache(), use_cache=True).past_key_values
+            loaded.prefix_caches[prefix] = (prefix_ids, cache)
+
+        prefix_ids, cache = loaded.prefix_caches[prefix]
+        # Only valid when the full prompt tokenizes to the same leading tokens
+        n = prefix_ids.shape[1]
+        if input_ids.shape[1] <= n or not torch.equal(input_ids[0, :n], prefix_ids[0]):
+            return None
+        return copy.deepcopy(cache)  # generate() extends the cache in place
+
+    def stream_response(self, user_input, max_new_tokens=256, temperature=0.7,
+                        stop_sequences=DEFAULT_STOP_SEQUENCES, reuse_prefix_cache=False):
+        """
+        Yield answer text as it is decoded. Generation runs on a worker thread behind a
+        TextIteratorStreamer and stops early at any stop sequence. Timing for the last
+        call (time to first token, tokens/sec) is left in self.last_stats.
+        """
+        from transformers import TextIteratorStreamer, StoppingCriteriaList
+
+        tokenizer, model = self.tokenizer, self.model
+        prompt = self.build_prompt(user_input)
+        inputs = tokenizer(prompt, return_tensors="pt")
+        prompt_length = inputs.input_ids.shape[1]
+
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        stopper = StopOnSequences(tokenizer, stop_sequences, prompt_length)
+        # Token id 0 is a valid pad id, so only fall back to EOS when there is none
+        pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        generate_kwargs = dict(
+            **inputs,
+            streamer=streamer,
+            max_new_tokens=max_new_tokens,
+            do_sample=True,
+            temperature=temperature,
+            pad_token_id=pad_token_id,
+            stopping_criteria=StoppingCriteriaList([stopper]),
+        )
+        if reuse_prefix_cache:
+            cache = self._prefix_cache(inputs.input_ids)
+            if cache is not None:
+                generate_kwargs["past_key_values"] = cache
+
+        errors = []
+
+        def _generate():
+            try:
+                model.generate(**generate_kwargs)
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                # Unblock the loop below even if generate() failed before streaming anything
+                streamer.end()
+
+        start = time.perf_counter()
+        first_token_at = None
+        worker = threading.Thread(target=_generate, daemon=True)
+        worker.start()
+
+        # Hold back enough characters that a partially streamed stop sequence is never shown
+        holdback = max((len(seq) for seq in stop_sequences), default=1) - 1
+        text, emitted = "", 0
+        for chunk in streamer:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            text += chunk
+            cut = min((i for i in (text.find(seq) for seq in stop_sequences) if i >= 0), default=-1)
+            if cut >= 0:
+                if cut > emitted:
+                    yield text[emitted:cut]
+                emitted = len(text)
+                break
+            safe = len(text) - holdback
+            if safe > emitted:
+                yield text[emitted:safe]
+                emitted = safe
+        else:
+            if len(text) > emitted:
+                yield text[emitted:]
+
+        worker.join()
+        if errors:
+            raise errors[0]
+        elapsed = time.perf_counter() - start
+        decode_time = elapsed - ((first_token_at or start) - start)
+        self.last_stats = {
+            "time_to_first_token": round((first_token_at or time.perf_counter()) - start, 3),
+            "tokens": stopper.generated,
+            "tokens_per_sec": round(stopper.generated / decode_time, 2) if decode_time > 0 else 0.0,
+            "total_seconds": round(elapsed, 3),
+        }
+
+
+class _RowFields(dict):
+    """format_map source: column values by name, blank for missing or empty cells."""
+
+    def __init__(self, row):
+        super().__init__((str(col), "" if pd.isna(value) else value) for col, value in row.items())
+
+    def __missing__(self, key):
+        return ""
+
+
+def _trim_answer(text):
+    """Cut a generated answer at the first stop sequence."""
+    for seq in DEFAULT_STOP_SEQUENCES:
+        text = text.split(seq, 1)[0]
+    return text.strip()
+
+
+class StopOnSequences:
+    """Stopping criterion: end generation once any stop sequence appears in the new text."""
+
+    def __init__(self, tokenizer, stop_sequences, prompt_length):
+        self.tokenizer = tokenizer
+        self.stop_sequences = list(stop_sequences)
+        self.prompt_length = prompt_length
+        self.generated = 0
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+        self.generated = input_ids.shape[1] - self.prompt_length
+        # Only the tail can contain a newly completed stop sequence
+        tail = self.tokenizer.decode(input_ids[0, self.prompt_length:][-16:], skip_special_tokens=True)
+        done = any(seq in tail for seq in self.stop_sequences)
+        return torch.full((input_ids.shape[0],), done, dtype=torch.bool)
@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+import pandas as pd
+
+CHECKPOINT_DIR = os.path.join(os.path.dirname(__file__), "outreach_jobs")
+
+# Process-wide so a job keeps running (and stays visible) across Streamlit reruns
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def job_id_for(template, rows):
+    """Same template over the same rows -> same id, so a rerun resumes from its checkpoint."""
+    digest = hashlib.sha1(template.encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(rows, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+class OutreachJob:
+    """
+    Generates drafts for a slice of prospects on a background thread. Each finished batch
+    is appended to a JSONL checkpoint, and rows already in the checkpoint are skipped on
+    restart.
+    """
+
+    def __init__(self, agent, template, rows, batch_size=8, max_new_tokens=200):
+        self.agent = agent
+        self.template = template
+        self.rows = rows
+        self.batch_size = batch_size
+        self.max_new_tokens = max_new_tokens
+        self.job_id = job_id_for(template, rows)
+        self.checkpoint_path = os.path.join(CHECKPOINT_DIR, f"{self.job_id}.jsonl")
+        self.answers = self._load_checkpoint()
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _load_checkpoint(self):
+        answers = {}
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # partial last line from an interrupted write
+                    answers[record["row"]] = record["draft"]
+        return answers
+
+    def _checkpoint(self, indices, drafts):
+        with self._lock:
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                for index, draft in zip(indices, drafts):
+                    f.write(json.dumps({"row": str(index), "draft": draft}) + "\n")
+                    self.answers[str(index)] = draft
+
+    def _run(self):
+        try:
+            pending = self.rows[[str(index) not in self.answers for index in self.rows.index]]
+            if not pending.empty:
+                self.agent.generate_batch(
+                    self.template,
+                    pending,
+                    batch_size=self.batch_size,
+                    max_new_tokens=self.max_new_tokens,
+                    on_batch=self._checkpoint
+                )
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+
+    def start(self):
+        if self._thread is None:
+            os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def completed(self):
+        with self._lock:
+            return len(self.answers)
+
+    @property
+    def progress(self):
+        return self.completed / len(self.rows) if len(self.rows) else 1.0
+
+    def results(self):
+        """The input rows with a Draft Message column (blank where not generated yet)."""
+        with self._lock:
+            drafts = [self.answers.get(str(index), "") for index in self.rows.index]
+        out = self.rows.copy()
+        out["Draft Message"] = drafts
+        return out
+
+
+def start_outreach_job(agent, template, rows, batch_size=8, max_new_tokens=200):
+    """Start (or return the already running) job for this template and rows."""
+    job_id = job_id_for(template, rows)
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None or (not job.running and job.error):
+            job = OutreachJob(agent, template, rows, batch_size=batch_size, max_new_tokens=max_new_tokens)
+            _jobs[job_id] = job
+    return job.start()
+
+
+def get_outreach_job(job_id):
+    with _jobs_lock:
+        return _jobs.get(job_id)
@@ -0,0 +1,157 @@
+import re
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from email_utils.semantic_utils import embed_texts
+
+_TOKEN_REGEX = re.compile(r"\w+")
+ANN_MIN_ROWS = 20000  # below this, exact NumPy search is fast enough
+
+
+def tokenize(text):
+    return _TOKEN_REGEX.findall(str(text).lower())
+
+
+def serialize_row(row):
+    """Same text the agent used to build on every call, now built once per row."""
+    return ", ".join(f"{col}: {value}" for col, value in row.items() if pd.notna(value))
+
+
+class BM25Index:
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.n_docs = 0
+        self.doc_lengths = np.zeros(0)
+        self.postings = {}  # term -> (doc positions, term frequencies)
+        self.idf = {}
+
+    def build(self, token_lists):
+        postings = {}
+        for position, tokens in enumerate(token_lists):
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(position)
+                postings[term][1].append(tf)
+        self.n_docs = len(token_lists)
+        self.doc_lengths = np.array([len(tokens) for tokens in token_lists], dtype=float)
+        self.postings = {term: (np.array(ids), np.array(tfs, dtype=float)) for term, (ids, tfs) in postings.items()}
+        self.idf = {
+            term: math.log(1 + (self.n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            for term, (ids, _) in self.postings.items()
+        }
+
+    def scores(self, query_tokens):
+        scores = np.zeros(self.n_docs)
+        if not self.n_docs:
+            return scores
+        avg_length = self.doc_lengths.mean() or 1.0
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / avg_length)
+        for term in set(query_tokens):
+            if term not in self.postings:
+                continue
+            ids, tfs = self.postings[term]
+            scores[ids] += self.idf[term] * tfs * (self.k1 + 1) / (tfs + norm[ids])
+        return scores
+
+
+class ProspectIndex:
+    """
+    Hybrid retrieval over prospect rows: SBERT vectors (exact NumPy, or a FAISS HNSW
+    index when installed and the table is large) plus BM25 keywords, fused by rank.
+    update() re-serializes and re-embeds only rows whose content changed.
+    """
+
+    def __init__(self, use_ann=None):
+        self.use_ann = use_ann
+        self.row_ids = []
+        self.texts = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.bm25 = BM25Index()
+        self._row_hashes = {}
+        self._ann = None
+
+    def __len__(self):
+        return len(self.row_ids)
+
+    def update(self, df):
+        """Sync the index with df; returns True when anything changed."""
+        if df is None or df.empty:
+            changed = bool(self.row_ids)
+            self.__init__(use_ann=self.use_ann)
+            return changed
+
+        if not df.index.is_unique:
+            df = df.reset_index(drop=True)
+        hashes = dict(zip(df.index, pd.util.hash_pandas_object(df, index=False).to_numpy()))
+        if hashes == self._row_hashes:
+            return False
+
+        previous = {row_id: i for i, row_id in enumerate(self.row_ids)}
+        texts, vectors, to_embed = [], [None] * len(df), []
+        for position, (row_id, row_hash) in enumerate(hashes.items()):
+            old = previous.get(row_id)
+            if old is not None and self._row_hashes.get(row_id) == row_hash:
+                texts.append(self.texts[old])
+                vectors[position] = self.vectors[old]
+            else:
+                texts.append(serialize_row(df.loc[row_id]))
+                to_embed.append(position)
+
+        if to_embed:
+            embedded = embed_texts([texts[i] for i in to_embed], convert_to_numpy=True)
+            embedded /= np.linalg.norm(embedded, axis=1, keepdims=True).clip(min=1e-12)
+            for position, vector in zip(to_embed, embedded):
+                vectors[position] = vector
+
+        self.row_ids = list(hashes)
+        self.texts = texts
+        self.vectors = np.vstack(vectors)
+        self.bm25.build([tokenize(text) for text in texts])
+        self._row_hashes = hashes
+        self._ann = self._build_ann()
+        return True
+
+    def _build_ann(self):
+        use_ann = self.use_ann if self.use_ann is not None else len(self.row_ids) >= ANN_MIN_ROWS
+        if not use_ann:
+            return None
+        try:
+            import faiss
+        except ImportError:
+            return None
+        index = faiss.IndexHNSWFlat(self.vectors.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+        index.add(self.vectors)
+        return index
+
+    def _vector_ranking(self, query, depth):
+        query_vector = embed_texts([query], convert_to_numpy=True)
+        query_vector /= max(np.linalg.norm(query_vector), 1e-12)
+        if self._ann is not None:
+            _, ids = self._ann.search(query_vector, depth)
+            return [i for i in ids[0] if i >= 0]
+        similarities = self.vectors @ query_vector[0]
+        top = np.argpartition(-similarities, min(depth, len(similarities) - 1))[:depth]
+        return list(top[np.argsort(-similarities[top])])
+
+    def search(self, query, k=3, depth=50, rrf_k=60):
+        """Top-k rows for the query by reciprocal-rank fusion of vector and BM25 rankings."""
+        if not self.row_ids:
+            return []
+        depth = min(depth, len(self.row_ids))
+
+        fused = Counter()
+        for rank, i in enumerate(self._vector_ranking(query, depth)):
+            fused[i] += 1 / (rrf_k + rank)
+        bm25_scores = self.bm25.scores(tokenize(query))
+        for rank, i in enumerate(np.argsort(-bm25_scores)[:depth]):
+            if bm25_scores[i] > 0:
+                fused[i] += 1 / (rrf_k + rank)
+
+        return [
+            {"text": self.texts[i], "metadata": {"row": self.row_ids[i], "score": round(score, 5)}}
+            for i, score in fused.most_common(k)
+        ]
@@ -0,0 +1,80 @@
+# name_matching.py
+# Compare per-address username matching against a NameMatcher built once per person,
+# on synthetic firm-directory pages with hundreds of addresses each.
+# Run from the repo root: python -m benchmarks.name_matching [addresses_per_page]
+import sys
+import time
+import numpy as np
+
+from email_utils.scraper_utils import MATCH_NONE, NameMatcher
+
+FIRST_NAMES = ["james", "mary", "john", "patricia", "robert", "jennifer", "michael", "linda", "david", "susan"]
+LAST_NAMES = ["smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "wilson", "moore"]
+PEOPLE = [("Jennifer", "Garcia"), ("David", "Moore"), ("Mary", "Smith"), ("Robert", "Wilson")]
+
+
+def legacy_match(username, first, last):
+    """The previous match_username_to_name: rebuilt forms and substring checks per call."""
+    username = username.lower()
+    first, last = first.lower(), last.lower()
+    f = first[0]
+    if username in {
+        f"{first}.{last}", f"{first}_{last}", f"{first}{last}",
+        f"{f}{last}", f"{last}{f}", f"{last}.{first}"
+    }:
+        return True
+    if first in username and last in username:
+        return True
+    if username.startswith(f + last) or username.startswith(last + f):
+        return True
+    if username.startswith(first) and last[0] in username:
+        return True
+    if username.startswith(f) and last in username:
+        return True
+    if username.startswith(first[:3]) and last[:3] in username:
+        return True
+    return False
+
+
+def make_directory_page(n_addresses, seed=0):
+    """Usernames in the mix of styles a directory page carries, plus role inboxes."""
+    rng = np.random.default_rng(seed)
+    styles = ["{first}.{last}", "{f}{last}", "{first}{l}", "{last}.{first}", "{first}_{last}", "{first}"]
+    usernames = []
+    for _ in range(n_addresses):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        style = styles[rng.integers(len(styles))]
+        usernames.append(style.format(first=first, last=last, f=first[0], l=last[0]))
+    usernames += ["info", "careers", "press", "compliance", "webmaster"]
+    return usernames
+
+
+def main(n_addresses=500, n_pages=50):
+    pages = [make_directory_page(n_addresses, seed=i) for i in range(n_pages)]
+
+    start = time.perf_counter()
+    legacy = [[legacy_match(u, first, last) for u in page] for first, last in PEOPLE for page in pages]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    graded = []
+    for first, last in PEOPLE:
+        matcher = NameMatcher(first, last)
+        graded += [matcher.classify(page) for page in pages]
+    matcher_s = time.perf_counter() - start
+
+    same = all(
+        [grade != MATCH_NONE for grade in grades] == matches
+        for grades, matches in zip(graded, legacy)
+    )
+    checks = len(PEOPLE) * n_pages * (n_addresses + 5)
+    strong = sum(grade == 2 for grades in graded for grade in grades)
+    loose = sum(grade == 1 for grades in graded for grade in grades)
+    print(f"{len(PEOPLE)} people x {n_pages} pages x {n_addresses + 5} addresses = {checks:,} checks")
+    print(f"per-call matching: {legacy_s * 1000:.1f} ms")
+    print(f"NameMatcher:       {matcher_s * 1000:.1f} ms ({legacy_s / matcher_s:.1f}x)")
+    print(f"grades: {strong:,} strong, {loose:,} loose | same accept/reject as before: {same}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
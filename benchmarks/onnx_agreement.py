@@ -0,0 +1,83 @@
+# onnx_agreement.py
+# Compare the int8 ONNX encoder against the fp32 PyTorch SBERT model on a small fixture corpus:
+# encode latency, per-text cosine agreement, and how well the semantic-score rankings match.
+# Run from the repo root: python -m benchmarks.onnx_agreement [repeats]
+import sys
+import time
+import numpy as np
+
+from email_utils.onnx_backend import load_onnx_encoder
+from email_utils.semantic_utils import MODEL_NAME, get_reference_phrases
+
+# Email contexts of the kind scraped from firm bios and team pages
+CORPUS = [
+    "Jane Smith is a senior wealth management advisor serving high net worth families in St. Louis.",
+    "Contact our institutional sales desk at sales@examplefunds.com for share class availability.",
+    "John Doe leads portfolio construction for the firm's multi-asset model portfolios.",
+    "For media inquiries please reach press@example.com.",
+    "Our private client advisors build customized plans across tax, estate and philanthropy.",
+    "Maria Lopez, CFA, covers alternative investments including private credit and real assets.",
+    "Join our team! Send your resume to careers@example.com.",
+    "The financial advisor team at Clayton Wealth Partners manages $2.1B for 400 households.",
+    "Click here to unsubscribe from our newsletter.",
+    "Tom Becker heads the OCIO business, partnering with endowments and foundations.",
+    "Webmaster: webmaster@example.org. Last updated March 2021.",
+    "Our RIA focuses on retirement income planning for physicians and dentists.",
+    "Sarah Chen is a partner and chief investment officer overseeing hedge fund allocations.",
+    "Parking is available in the garage on Forsyth Boulevard.",
+    "The municipal bond desk supports registered investment advisors and bank trust departments.",
+    "Email david.kim@examplewealth.com to schedule a portfolio review.",
+    "We are a family office investing directly in venture capital and private equity.",
+    "Customer support hours are Monday to Friday, 9am to 5pm.",
+    "Rachel Adams, CFP, advises business owners on succession and liquidity events.",
+    "Our ESG and impact investing program screens managers for sustainability criteria.",
+    "Download the quarterly market commentary from our research team.",
+    "Kevin O'Brien is a regional consultant covering wirehouse and independent broker-dealer channels.",
+    "Privacy policy and terms of use apply to all content on this site.",
+    "The trust company provides fiduciary services and discretionary asset management.",
+]
+
+
+def spearman(a, b):
+    rank_a = np.argsort(np.argsort(-np.asarray(a)))
+    rank_b = np.argsort(np.argsort(-np.asarray(b)))
+    return float(np.corrcoef(rank_a, rank_b)[0, 1])
+
+
+def timed_encode(encoder, texts, repeats):
+    encoder.encode(texts[:2], convert_to_numpy=True)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        embeddings = encoder.encode(texts, batch_size=32, convert_to_numpy=True)
+    return np.asarray(embeddings, dtype=np.float32), (time.perf_counter() - start) / repeats
+
+
+def main(repeats=10, top_k=5):
+    from sentence_transformers import SentenceTransformer
+
+    reference_phrases = get_reference_phrases()
+    texts = CORPUS + reference_phrases
+    fp32, fp32_s = timed_encode(SentenceTransformer(MODEL_NAME), texts, repeats)
+    int8, int8_s = timed_encode(load_onnx_encoder(MODEL_NAME), texts, repeats)
+
+    # Per-text agreement between the two embeddings (both are L2-normalized)
+    cosine = (fp32 * int8).sum(axis=1)
+
+    # Semantic score = max cosine against the reference phrases, as in semantic_scores()
+    n = len(CORPUS)
+    fp32_scores = (fp32[:n] @ fp32[n:].T).max(axis=1)
+    int8_scores = (int8[:n] @ int8[n:].T).max(axis=1)
+    top_fp32 = set(np.argsort(-fp32_scores)[:top_k])
+    top_int8 = set(np.argsort(-int8_scores)[:top_k])
+
+    print(f"corpus: {n} contexts + {len(reference_phrases)} reference phrases, {repeats} repeats")
+    print(f"fp32 torch: {fp32_s * 1000:.1f} ms / pass")
+    print(f"int8 onnx:  {int8_s * 1000:.1f} ms / pass  ({fp32_s / int8_s:.2f}x)")
+    print(f"embedding cosine fp32 vs int8: mean {cosine.mean():.4f}, min {cosine.min():.4f}")
+    print(f"score max abs diff: {np.abs(fp32_scores - int8_scores).max():.4f}")
+    print(f"ranking spearman: {spearman(fp32_scores, int8_scores):.4f}")
+    print(f"top-{top_k} overlap: {len(top_fp32 & top_int8)}/{top_k}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,98 @@
+# rule_scoring.py
+# Check that rule_based_scores matches df.apply(rule_based_score, axis=1) exactly, including
+# NaN AUM, mixed-case text, missing columns and scores that sit on a rounding tie, and time both.
+# A small fixed frame is also checked against the original row-wise scorer before anything is timed.
+# Run from the repo root: python -m benchmarks.rule_scoring [n_rows]
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from prospect_utils.score_utils import rule_based_score, rule_based_scores
+
+STRATEGIES = ["Alts", "HEDGE Fund", "etf Model", "Index", "Fixed Income", "Equity", None, np.nan]
+METROS = ["New York", "NEW YORK", "chicago", "Houston ", "Miami", "St. Louis", None, np.nan]
+
+
+def legacy_rule_based_score(row):
+    """The row-wise scorer before its weights became configurable."""
+    score = 0.0
+    aum = row.get("AUM", 0)
+    score += ((aum - 10) / (1000 - 10)) * 0.6
+    strat = str(row.get("Strategy", "")).lower()
+    if "alts" in strat or "hedge" in strat:
+        score += 0.2
+    elif "etf" in strat or "index" in strat:
+        score += 0.1
+    metro = str(row.get("Metro", "")).lower()
+    if metro in ["new york", "los angeles", "chicago", "houston", "miami"]:
+        score += 0.1
+    return round(min(score, 1.0), 4)
+
+
+# Hand-picked rows: AUM terms that land on a rounding tie alone and under each bonus (0.1, 0.2,
+# 0.3), NaN, zero and clipped AUM, and text that only nearly matches a keyword or metro
+FIXTURE = pd.DataFrame({
+    "AUM": [10.0825, 10.4125, 10.9075, 11.0725, 12.0625, 13.0525, np.nan, 0.0, 5000.0, 500.0],
+    "Strategy": ["ETF Model", "Alts", "HEDGE Fund", "Index", "Equity", None, None, "Equity", "alts", "Fixed Income"],
+    "Metro": [None, np.nan, "Chicago", "St. Louis", "Dallas", None, "NEW YORK", "Miami", "Houston", "Houston "],
+})
+
+
+def check_fixture():
+    """rule_based_scores against the original scorer, on object-dtype and all-numeric rows."""
+    frames = {
+        "fixture": FIXTURE,
+        "fixture, categorical text": FIXTURE.astype({"Strategy": "category", "Metro": "category"}),
+        "fixture, AUM only": FIXTURE[["AUM"]],
+    }
+    for label, df in frames.items():
+        expected = df.apply(legacy_rule_based_score, axis=1).astype(float).rename("Score")
+        pd.testing.assert_series_equal(rule_based_scores(df), expected, check_exact=True)
+        print(f"{label:<26} matches the original row-wise scorer")
+
+
+def make_prospects(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    # AUM steps of 0.0165 move the AUM term by 0.00001, so many scores sit on a 5th-decimal
+    # tie where np.round and the built-in round can disagree
+    aum = 10 + rng.integers(0, 120_000, n_rows) * 0.0165
+    aum[rng.random(n_rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        "AUM": aum,
+        "Strategy": rng.choice(np.array(STRATEGIES, dtype=object), n_rows),
+        "Metro": rng.choice(np.array(METROS, dtype=object), n_rows),
+    })
+
+
+def check(df, label):
+    start = time.perf_counter()
+    expected = df.apply(rule_based_score, axis=1)
+    apply_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = rule_based_scores(df)
+    columnar_s = time.perf_counter() - start
+
+    expected = expected.astype(float).rename("Score")
+    pd.testing.assert_series_equal(actual, expected, check_exact=True)
+    print(f"{label:<24} apply {apply_s * 1000:8.1f} ms | columnar {columnar_s * 1000:6.1f} ms | identical: True")
+
+
+def main(n_rows=20_000):
+    check_fixture()
+    df = make_prospects(n_rows)
+    raw = (df["AUM"] - 10) / 990 * 0.6
+    ties = sum(round(v, 4) != np.round(v, 4) for v in raw.dropna().tolist())
+    print(f"{n_rows:,} rows, {ties:,} AUM terms where np.round and round disagree")
+    check(df, "all columns")
+    check(df.astype({"Strategy": "category", "Metro": "category"}), "categorical text")
+    check(df.drop(columns=["AUM"]), "no AUM column")
+    check(df.drop(columns=["Strategy", "Metro"]), "no Strategy / Metro")
+    check(df.assign(AUM=df["AUM"].fillna(0).round().astype(int)), "integer AUM")
+    check(df[["AUM"]].fillna(0).round().astype(int).assign(Rank=1), "integer-only frame")
+    check(df.iloc[:0], "empty frame")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
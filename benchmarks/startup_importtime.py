@@ -0,0 +1,72 @@
+# startup_importtime.py
+# Import the app's page modules under `python -X importtime` and report where startup time goes.
+# Run from the repo root: python -m benchmarks.startup_importtime [top_n]
+# Exits non-zero if a heavy ML library is imported at startup, so regressions are easy to catch.
+import os
+import sys
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Same modules main.py loads, imported the same way (by file path)
+PAGES = {
+    "email_search_rank": "modules/1_email_search_rank.py",
+    "prospecting_map": "modules/2_prospect_search.py",
+    "ai_outreach": "modules/3_ai_outreach.py",
+}
+
+# Must only be imported once a model is actually needed
+HEAVY_MODULES = ("torch", "transformers", "sentence_transformers", "onnxruntime", "faiss")
+
+IMPORT_SCRIPT = """
+import importlib.util, sys
+for name, path in {pages!r}.items():
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+"""
+
+
+def run_importtime(pages=PAGES):
+    """Returns [(module, self_us, cumulative_us)] as reported by -X importtime; nested imports keep their indent."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT.format(pages=pages)],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+
+    records = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        records.append((module[1:].rstrip(), int(self_us), int(cumulative_us)))
+    return records
+
+
+def main(top_n=15):
+    records = run_importtime()
+    top_level = [r for r in records if not r[0].startswith(" ")]
+    total_us = sum(self_us for _, self_us, _ in records)
+    roots = {name.strip().split(".")[0] for name, _, _ in records}
+    heavy = sorted(roots.intersection(HEAVY_MODULES))
+
+    print(f"modules imported: {len(records):,} | total import time: {total_us / 1e6:.2f}s")
+    print(f"\ntop {top_n} by cumulative time:")
+    for name, _, cumulative_us in sorted(top_level, key=lambda r: -r[2])[:top_n]:
+        print(f"  {cumulative_us / 1e3:9.1f} ms  {name.strip()}")
+    print(f"\ntop {top_n} by self time:")
+    for name, self_us, _ in sorted(records, key=lambda r: -r[1])[:top_n]:
+        print(f"  {self_us / 1e3:9.1f} ms  {name.strip()}")
+
+    if heavy:
+        print(f"\n[!] heavy modules imported at startup: {', '.join(heavy)}")
+        return 1
+    print("\nno heavy ML modules imported at startup")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 15))
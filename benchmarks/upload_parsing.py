@@ -0,0 +1,55 @@
+# upload_parsing.py
+# Check that the pyarrow CSV reader gives the same frame as pandas' default engine on
+# uploads with blanks, NA markers, ZIPs, dates and all-empty columns, and time both.
+# Run from the repo root: python -m benchmarks.upload_parsing [n_rows]
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from upload_utils.upload_loader import NULL_VALUES, _parse_csv
+
+CITIES = ["St. Louis", "Clayton", "New York", "Chicago", "Boston", "Zürich"]
+
+
+def make_upload(n_rows, seed=0):
+    """CSV bytes shaped like a CRM export, with every kind of missing cell pandas recognizes."""
+    rng = np.random.default_rng(seed)
+    markers = NULL_VALUES + ["n/a", "NULL"]
+
+    def blank_some(values, share=0.1):
+        return [markers[rng.integers(len(markers))] if rng.random() < share else v for v in values]
+
+    frame = pd.DataFrame({
+        "Contact Name": blank_some([f"Person {i}" for i in range(n_rows)]),
+        "Dakota Billing City": blank_some(rng.choice(CITIES, n_rows)),
+        "Dakota Billing Zip/Postal Code": blank_some([f"{z:05d}" for z in rng.integers(0, 99999, n_rows)]),
+        "CRD#": blank_some([str(c) for c in rng.integers(1000, 9_999_999, n_rows)]),
+        "AUM": blank_some([f"{v:.2f}" for v in rng.lognormal(15, 2, n_rows)]),
+        "Employees": blank_some([str(v) for v in rng.integers(1, 500, n_rows)]),
+        "Last Contacted": blank_some([f"2024-{m:02d}-{d:02d}" for m, d in zip(rng.integers(1, 13, n_rows), rng.integers(1, 29, n_rows))]),
+        "Active": blank_some(rng.choice(["True", "False"], n_rows), share=0.0),
+        "Notes": [""] * n_rows,
+    })
+    return frame.to_csv(index=False).encode("utf-8")
+
+
+def main(n_rows=50_000):
+    data = make_upload(n_rows)
+
+    start = time.perf_counter()
+    default = _parse_csv(data, "utf-8", engine="c")
+    default_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    arrow = _parse_csv(data, "utf-8", engine="pyarrow")
+    arrow_s = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(arrow, default)
+    print(f"{n_rows:,} rows, {len(data) / 1e6:.1f} MB")
+    print(f"pandas C engine: {default_s * 1000:.1f} ms")
+    print(f"pyarrow:         {arrow_s * 1000:.1f} ms ({default_s / arrow_s:.1f}x) | identical frames: True")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,116 @@
+# adaptive_fetch.py
+# Fetch search results best-first and stop once a candidate is confident enough,
+# instead of downloading every result for every person.
+import re
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+from email_utils.scoring_utils import score_candidates
+from email_utils.scraper_utils import NameMatcher, extract_candidates
+
+DEFAULT_CONFIDENCE_THRESHOLD = 0.6
+DEFAULT_WAVE_SIZE = 2
+
+_GENERIC_COMPANY_WORDS = {
+    "inc", "llc", "llp", "ltd", "lp", "co", "corp", "company", "group", "the", "and",
+    "capital", "partners", "advisors", "advisory", "wealth", "management", "financial", "investments",
+}
+
+
+def company_tokens(company):
+    """Distinctive words of the company name, as they might appear in its domain."""
+    words = re.findall(r"[a-z0-9]+", str(company).lower())
+    distinctive = [word for word in words if len(word) >= 3 and word not in _GENERIC_COMPANY_WORDS]
+    return distinctive or [word for word in words if len(word) >= 3]
+
+
+def url_prior(result, rank, first, last, company):
+    """
+    Cheap likelihood that a search result holds the person's email: company name in the
+    domain, person's name in the title/snippet, plus the same source-rank bonus that
+    combine_confidence gives.
+    """
+    host = urlparse(result.get("link", "")).netloc.lower().replace("-", "")
+    text = f"{result.get('title', '')} {result.get('snippet', '')}".lower()
+    prior = 0.0
+    if any(token in host for token in company_tokens(company)):
+        prior += 0.5
+    if str(first).lower() in text and str(last).lower() in text:
+        prior += 0.3
+    return prior + max(0, 0.1 - 0.01 * rank)
+
+
+def order_by_prior(results, first, last, company):
+    """[(source rank, result, prior)] best first; ties keep the search engine's order."""
+    ranked = [(rank, result, url_prior(result, rank, first, last, company)) for rank, result in enumerate(results)]
+    return sorted(ranked, key=lambda item: (-item[2], item[0]))
+
+
+def latency_summary(latencies):
+    if not latencies:
+        return {}
+    values = np.asarray(latencies)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p90": round(float(np.percentile(values, 90)), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def adaptive_discover(results, first, last, company, fetch, reference_embeddings=None,
+                      threshold=DEFAULT_CONFIDENCE_THRESHOLD, wave_size=DEFAULT_WAVE_SIZE,
+                      map_fn=map, matcher=None):
+    """
+    Fetch results in waves of wave_size, best prior first, and stop as soon as a scored
+    candidate reaches threshold. fetch(url) returns html; map_fn lets callers fetch a wave
+    concurrently (e.g. a thread pool's map).
+
+    Returns (candidates, snippets, stats). Candidates are (email, context, grade, source rank)
+    so the final score includes the match grade and source-rank bonus.
+    """
+    matcher = matcher or NameMatcher(first, last)
+    ordered = order_by_prior(results, first, last, company)
+    candidates, snippets, latencies = [], [], []
+    fetched, best, extract_seconds = 0, None, 0.0
+
+    def timed_fetch(url):
+        start = time.perf_counter()
+        html = fetch(url)
+        return html, time.perf_counter() - start
+
+    for start in range(0, len(ordered), wave_size):
+        wave = ordered[start:start + wave_size]
+        pages = list(map_fn(timed_fetch, [result["link"] for _, result, _ in wave]))
+        fetched += len(wave)
+
+        wave_candidates = []
+        extract_start = time.perf_counter()
+        for (rank, _, _), (html, seconds) in zip(wave, pages):
+            latencies.append(seconds)
+            if not html:
+                continue
+            page_candidates, page_snippets = extract_candidates(html, first, last, matcher=matcher)
+            wave_candidates += [(email, context, grade, rank) for email, context, grade in page_candidates]
+            snippets.extend(page_snippets)
+        extract_seconds += time.perf_counter() - extract_start
+        candidates.extend(wave_candidates)
+
+        if wave_candidates:
+            top = score_candidates(wave_candidates, reference_embeddings)
+            if top and (best is None or top[0][2] > best):
+                best = top[0][2]
+        if best is not None and best >= threshold:
+            break
+
+    stats = {
+        "available": len(ordered),
+        "fetched": fetched,
+        "saved": len(ordered) - fetched,
+        "early_exit": fetched < len(ordered),
+        "best_score": best,
+        "latencies": latencies,
+        "extract_seconds": extract_seconds,
+    }
+    return candidates, snippets, stats
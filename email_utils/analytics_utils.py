@@ -1,15 +1,192 @@
 from collections import Counter
+import os
 import re
+import json
+import heapq
+import tempfile
+import threading
+
+WORD_STATS_PATH = os.path.join(os.path.dirname(__file__), 'word_stats.json')
+SKETCH_CAPACITY = 2000  # counters kept per top-k sketch; counts are exact while distinct words fit
+
+_TOKEN_REGEX = re.compile(r'\b\w+\b')
+
+# Tokens longer than two characters that say nothing about a contact's role
+STOPWORDS = frozenset("""
+the and for are but not you all any can had her was one our out has him his how its may new now
+old see two who did get let put say she too use that with have this will your from they been
+more when were what there their which would about into than them then these some could other
+also only over such just like here where after most many those while both each very much does
+http https www com org net html email contact contacts click page home privacy policy
+terms cookies copyright rights reserved menu search read more view
+""".split())
+
+
+def iter_tokens(text):
+    """Lowercased tokens longer than two characters, skipping stopwords; nothing is materialized."""
+    for match in _TOKEN_REGEX.finditer(text.lower()):
+        word = match.group()
+        if len(word) > 2 and word not in STOPWORDS:
+            yield word
+
 
 def clean_and_tokenize(text):
-    words = re.findall(r'\b\w+\b', text.lower())
-    return [w for w in words if len(w) > 2]
+    return list(iter_tokens(text))
+
+
+class SpaceSaving:
+    """
+    Space-Saving top-k sketch (Metwally et al.): at most `capacity` counters. When full, a
+    new item replaces the current minimum and inherits its count as an overestimate, so any
+    item with true frequency above total / capacity is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity=SKETCH_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        self._heap = []  # (count, item), lazily invalidated
+
+    def update(self, item, count=1):
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            floor, victim = self._pop_min()
+            del self.counts[victim], self.errors[victim]
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+        heapq.heappush(self._heap, (self.counts[item], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def update_many(self, items):
+        for item in items:
+            self.update(item)
+
+    def _pop_min(self):
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:  # skip stale entries
+                return count, item
+
+    def _rebuild_heap(self):
+        self._heap = [(count, item) for item, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def most_common(self, n=None):
+        return Counter(self.counts).most_common(n)
+
+    def merge(self, other):
+        for item, count in other.counts.items():
+            self.update(item, count)
+
+    def to_dict(self):
+        return {"capacity": self.capacity, "total": self.total, "counts": self.counts, "errors": self.errors}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data.get("capacity", SKETCH_CAPACITY))
+        sketch.counts = {item: int(count) for item, count in data.get("counts", {}).items()}
+        sketch.errors = {item: int(data.get("errors", {}).get(item, 0)) for item in sketch.counts}
+        sketch.total = int(data.get("total", sum(sketch.counts.values())))
+        sketch._rebuild_heap()
+        return sketch
+
+
+class WordFrequencyTracker:
+    """Streaming word counts over snippets, optionally persisted as JSON between sessions."""
+
+    def __init__(self, capacity=SKETCH_CAPACITY, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.sketch = SpaceSaving(capacity)
+        self.snippets = 0
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.sketch = SpaceSaving.from_dict(data["sketch"])
+            self.snippets = data.get("snippets", 0)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[!] Could not read word stats {self.path}: {e}")
+
+    def update(self, text):
+        with self._lock:
+            self.sketch.update_many(iter_tokens(text))
+            self.snippets += 1
+
+    def update_many(self, text_blocks):
+        for block in text_blocks:
+            self.update(block)
+
+    def merge(self, other):
+        with self._lock:
+            self.sketch.merge(other.sketch)
+            self.snippets += other.snippets
+
+    def most_common(self, n=20):
+        with self._lock:
+            return self.sketch.most_common(n)
+
+    def to_json(self):
+        with self._lock:
+            return self._dumps()
+
+    def _dumps(self):
+        return json.dumps({"snippets": self.snippets, "sketch": self.sketch.to_dict()})
+
+    @classmethod
+    def from_json(cls, payload, path=None):
+        tracker = cls(path=path)
+        data = json.loads(payload)
+        tracker.sketch = SpaceSaving.from_dict(data["sketch"])
+        tracker.snippets = data.get("snippets", 0)
+        return tracker
+
+    def save(self):
+        if not self.path:
+            return
+        # Saves are serialized, and each writes its own temp file, so concurrent saves
+        # (threads or server processes) never interleave into one file
+        with self._lock:
+            tmp_path = None
+            try:
+                with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(self.path), suffix=".tmp", delete=False) as f:
+                    tmp_path = f.name
+                    f.write(self._dumps())
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"[!] Could not persist word stats {self.path}: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+
+_all_time = None
+_all_time_lock = threading.Lock()
+
+
+def get_all_time_tracker():
+    """Word counts across every search and batch, shared by the whole process."""
+    global _all_time
+    with _all_time_lock:
+        if _all_time is None:
+            _all_time = WordFrequencyTracker(path=WORD_STATS_PATH)
+        return _all_time
+
 
 def compute_word_frequencies(text_blocks, top_n=20):
-    all_tokens = []
-    for block in text_blocks:
-        all_tokens.extend(clean_and_tokenize(block))
-    return Counter(all_tokens).most_common(top_n)
+    tracker = WordFrequencyTracker()
+    tracker.update_many(text_blocks)
+    return tracker.most_common(top_n)
 
 def generate_metrics_summary(emails_found, sources_scanned, avg_score):
     return {
@@ -0,0 +1,237 @@
+# batch_pipeline.py
+import time
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import pandas as pd
+
+from email_utils.semantic_utils import get_reference_embeddings
+from email_utils.usage_counter import reserve_api_queries, flush_api_counts
+from email_utils.scoring_utils import score_candidate_batches
+from email_utils.adaptive_fetch import DEFAULT_CONFIDENCE_THRESHOLD, adaptive_discover, latency_summary
+from email_utils.scraper_utils import (
+    run_reverse_search,
+    fetch_html_from_url,
+    extract_candidates,
+    normalize_search_results,
+    NameMatcher,
+)
+
+STAGES = ["search", "fetch", "extract", "score"]
+
+
+class BatchStats:
+    """Thread-safe per-stage latency and throughput tracking for a batch run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.rows_done = 0
+        self.started = time.perf_counter()
+        self.finished = None
+        self.queries_reserved = None
+        self.fetches_available = 0
+        self.fetches_saved = 0
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.latencies[stage].append(seconds)
+
+    def record_fetches(self, available, saved):
+        with self._lock:
+            self.fetches_available += available
+            self.fetches_saved += saved
+
+    def row_done(self):
+        with self._lock:
+            self.rows_done += 1
+
+    def elapsed(self):
+        end = self.finished or time.perf_counter()
+        return end - self.started
+
+    def rows_per_minute(self):
+        elapsed = self.elapsed()
+        return self.rows_done / elapsed * 60 if elapsed > 0 else 0.0
+
+    def summary(self):
+        summary = {
+            "Rows Processed": self.rows_done,
+            "Elapsed (s)": round(self.elapsed(), 1),
+            "Rows / Min": round(self.rows_per_minute(), 1),
+        }
+        if self.queries_reserved is not None:
+            summary["SerpAPI Queries Reserved"] = self.queries_reserved
+        if self.fetches_available:
+            summary["Fetches Saved"] = f"{self.fetches_saved} / {self.fetches_available}"
+        for name, value in latency_summary(self.latencies.get("fetch")).items():
+            summary[f"Fetch latency {name} (s)"] = value
+        for stage in STAGES:
+            values = self.latencies.get(stage)
+            if values:
+                summary[f"Avg {stage} latency (s)"] = round(sum(values) / len(values), 3)
+                summary[f"Max {stage} latency (s)"] = round(max(values), 3)
+        return summary
+
+
+class HostLimiter:
+    """Caps the number of in-flight fetches per host."""
+
+    def __init__(self, per_host=2):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def _semaphore(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+    @contextmanager
+    def slot(self, url):
+        semaphore = self._semaphore(url)
+        with semaphore:
+            yield
+
+
+def _fetch(url, limiter, stats):
+    with limiter.slot(url):
+        start = time.perf_counter()
+        html = fetch_html_from_url(url)
+        stats.record("fetch", time.perf_counter() - start)
+    return html
+
+
+def _gather_row(row, fetch_pool, limiter, stats, max_results, reservation, adaptive=False,
+                confidence_threshold=DEFAULT_CONFIDENCE_THRESHOLD):
+    """
+    Search, fetch and extract for one row; final scoring happens later in batches.
+    In adaptive mode pages are fetched best-first and the row stops early once a
+    candidate is confident enough.
+    """
+    first, last, company = row["First Name"], row["Last Name"], row["Company"]
+
+    start = time.perf_counter()
+    search_results, status = run_reverse_search(
+        first, last, company, title=row.get("Title", None), max_results=max_results, bulk=True,
+        reservation=reservation
+    )
+    stats.record("search", time.perf_counter() - start)
+
+    results = normalize_search_results(search_results)
+    matcher = NameMatcher(first, last)
+
+    if adaptive:
+        candidates, context_blocks, fetch_stats = adaptive_discover(
+            results, first, last, company,
+            fetch=lambda url: _fetch(url, limiter, stats),
+            threshold=confidence_threshold,
+            map_fn=fetch_pool.map,
+            matcher=matcher
+        )
+        stats.record_fetches(fetch_stats["available"], fetch_stats["saved"])
+        stats.record("extract", fetch_stats["extract_seconds"])
+        return {"candidates": candidates, "context_blocks": context_blocks, "status": status}
+
+    urls = [result["link"] for result in results]
+    pages = list(fetch_pool.map(lambda url: _fetch(url, limiter, stats), urls))
+    stats.record_fetches(len(urls), 0)
+
+    start = time.perf_counter()
+    candidates, context_blocks = [], []
+    for rank, html in enumerate(pages):
+        if not html:
+            continue
+        page_candidates, snippets = extract_candidates(html, first, last, matcher=matcher)
+        candidates.extend((email, context, grade, rank) for email, context, grade in page_candidates)
+        context_blocks.extend(snippets)
+    stats.record("extract", time.perf_counter() - start)
+
+    return {"candidates": candidates, "context_blocks": context_blocks, "status": status}
+
+
+def _score_pending(pending, results, reference_embeddings, stats, on_result, encode_batch_size):
+    start = time.perf_counter()
+    ranked = score_candidate_batches(
+        [gathered["candidates"] for _, gathered in pending], reference_embeddings, batch_size=encode_batch_size
+    )
+    for (position, gathered), scored in zip(pending, ranked):
+        results[position] = {
+            "scored": scored,
+            "status": gathered["status"],
+            "context_blocks": gathered["context_blocks"],
+            "error": gathered.get("error"),
+        }
+    stats.record("score", time.perf_counter() - start)
+
+    for position, _ in pending:
+        stats.row_done()
+        if on_result:
+            on_result(position, results[position])
+
+
+def run_batch_discovery(df, max_workers=8, fetch_workers=16, per_host_limit=2,
+                        score_batch_size=16, encode_batch_size=64, max_results=7, on_result=None,
+                        adaptive=False, confidence_threshold=DEFAULT_CONFIDENCE_THRESHOLD, cancel=None):
+    """
+    Pipelined batch email discovery.
+
+    Rows are searched and fetched concurrently (bounded pools, per-host limits), then
+    scored in batches on the calling thread with one encode call per batch of rows.
+    adaptive=True fetches each row's results best-first and stops at confidence_threshold.
+    Setting the cancel Event (or an exception from on_result) drops every row not started
+    yet; rows already in flight finish but are not scored.
+    Returns (results, stats) where results is a list aligned with the input row order.
+    """
+    rows = [row for _, row in df.iterrows()] if isinstance(df, pd.DataFrame) else list(df)
+    results = [None] * len(rows)
+    stats = BatchStats()
+    limiter = HostLimiter(per_host_limit)
+    reference_embeddings = get_reference_embeddings()
+    if cancel is not None and cancel.is_set():
+        # e.g. the job was taken over while the embedding model was loading
+        return results, stats
+    # Pre-bill the batch's searches once instead of touching the counter per row
+    reservation = reserve_api_queries("serpapi", len(rows))
+    stats.queries_reserved = reservation.granted
+
+    with reservation, ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+            ThreadPoolExecutor(max_workers=max_workers) as row_pool:
+        futures = {
+            row_pool.submit(
+                _gather_row, row, fetch_pool, limiter, stats, max_results, reservation, adaptive, confidence_threshold
+            ): position
+            for position, row in enumerate(rows)
+        }
+
+        try:
+            pending = []
+            for future in as_completed(futures):
+                if cancel is not None and cancel.is_set():
+                    break
+                position = futures[future]
+                try:
+                    gathered = future.result()
+                except Exception as e:
+                    print(f"[!] Batch row {position} failed: {e}")
+                    gathered = {"candidates": [], "context_blocks": [], "status": None, "error": str(e)}
+                pending.append((position, gathered))
+
+                if len(pending) >= score_batch_size:
+                    _score_pending(pending, results, reference_embeddings, stats, on_result, encode_batch_size)
+                    pending = []
+            else:
+                if pending:
+                    _score_pending(pending, results, reference_embeddings, stats, on_result, encode_batch_size)
+        finally:
+            # No-op after a full run; otherwise queued rows never start their (billed) searches
+            row_pool.shutdown(wait=False, cancel_futures=True)
+
+    flush_api_counts()
+    stats.finished = time.perf_counter()
+    return results, stats
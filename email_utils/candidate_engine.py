@@ -0,0 +1,200 @@
+# candidate_engine.py
+import os
+import re
+import json
+import tempfile
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from email_utils.scraper_utils import USERNAME_PATTERNS
+
+PATTERN_INDEX_PATH = os.path.join(os.path.dirname(__file__), 'pattern_index.json')
+
+# Addresses on these domains say nothing about the employer's convention
+PERSONAL_DOMAINS = {
+    "gmail.com", "yahoo.com", "hotmail.com", "outlook.com", "aol.com", "icloud.com",
+    "me.com", "msn.com", "live.com", "comcast.net", "protonmail.com",
+}
+_COMPANY_SUFFIXES = re.compile(r"\b(inc|llc|llp|ltd|lp|co|corp|corporation|company|group|the)\b")
+
+
+def normalize_name(name):
+    """'José' -> 'jose', "O'Brien" -> 'obrien'; usernames rarely keep accents or punctuation."""
+    if name is None or name != name:  # None / NaN
+        return ""
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z]", "", text.lower())
+
+
+def company_key(company):
+    if company is None or company != company:
+        return ""
+    text = re.sub(r"[^a-z0-9 ]", " ", str(company).lower())
+    return " ".join(_COMPANY_SUFFIXES.sub(" ", text).split())
+
+
+def render_pattern(pattern, first, last):
+    return pattern.format(first=first, last=last, f=first[:1], l=last[:1])
+
+
+def infer_patterns(username, first, last):
+    """USERNAME_PATTERNS that produce this username for this person (several for e.g. 'jsmith')."""
+    first, last = normalize_name(first), normalize_name(last)
+    if not first or not last:
+        return []
+    username = username.lower()
+    return [pattern for pattern in USERNAME_PATTERNS if render_pattern(pattern, first, last) == username]
+
+
+class PatternIndex:
+    """
+    Per-domain counts of address patterns and per-company counts of domains, learned from
+    confirmed emails and persisted as JSON. Observing the same address twice is a no-op,
+    so re-running a batch does not inflate the counts.
+    """
+
+    def __init__(self, path=PATTERN_INDEX_PATH, known=frozenset()):
+        self.path = path  # None keeps the index in memory only
+        self.known = known  # addresses already counted elsewhere (e.g. the persisted index)
+        self._lock = threading.Lock()
+        self.domain_patterns = defaultdict(Counter)   # domain -> pattern -> count
+        self.company_domains = defaultdict(Counter)   # company key -> domain -> count
+        self.seen = set()
+        self._snapshot = None
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[!] Could not read pattern index {self.path}: {e}")
+            return
+        for domain, counts in data.get("domain_patterns", {}).items():
+            self.domain_patterns[domain].update(counts)
+        for company, counts in data.get("company_domains", {}).items():
+            self.company_domains[company].update(counts)
+        self.seen.update(data.get("seen", []))
+
+    def save(self):
+        if not self.path:
+            return
+        # Saves are serialized, and each writes its own temp file, so concurrent saves
+        # (threads or server processes) never interleave into one file
+        with self._lock:
+            data = {
+                "domain_patterns": {domain: dict(counts) for domain, counts in self.domain_patterns.items()},
+                "company_domains": {company: dict(counts) for company, counts in self.company_domains.items()},
+                "seen": sorted(self.seen),
+            }
+            tmp_path = None
+            try:
+                with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(self.path), suffix=".tmp", delete=False) as f:
+                    tmp_path = f.name
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"[!] Could not persist pattern index {self.path}: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def observe(self, first, last, company, email):
+        """Learn from one confirmed email; returns True if it was new and informative."""
+        email = str(email).strip().lower()
+        if "@" not in email:
+            return False
+        username, domain = email.rsplit("@", 1)
+        if domain in PERSONAL_DOMAINS:
+            return False
+        patterns = infer_patterns(username, first, last)
+        if not patterns:
+            return False  # address doesn't follow the person's name, e.g. info@ or a colleague's
+        with self._lock:
+            if email in self.seen or email in self.known:
+                return False
+            self.seen.add(email)
+            self._snapshot = None
+            for pattern in patterns:
+                # Ambiguous matches share one observation
+                self.domain_patterns[domain][pattern] += 1 / len(patterns)
+            key = company_key(company)
+            if key:
+                self.company_domains[key][domain] += 1
+        return True
+
+    def snapshot(self):
+        """Frozen copy for readers running alongside observe(); rebuilt only after the index changes."""
+        with self._lock:
+            if self._snapshot is None:
+                frozen = PatternIndex(path=None)
+                frozen.domain_patterns.update({domain: Counter(counts) for domain, counts in self.domain_patterns.items()})
+                frozen.company_domains.update({company: Counter(counts) for company, counts in self.company_domains.items()})
+                frozen.seen = frozenset(self.seen)
+                self._snapshot = frozen
+            return self._snapshot
+
+
+class CandidateEngine:
+    def __init__(self, index=None):
+        self.index = index or PatternIndex()
+
+    def learn(self, records):
+        """records: (first, last, company, email); updates and saves the persisted index."""
+        learned = sum(self.index.observe(*record) for record in records if record[3])
+        if learned:
+            self.index.save()
+        return learned
+
+    def suggest(self, records, top_k=3):
+        """
+        Ranked (email, confidence) candidates for each record without an email, using the
+        persisted index plus whatever colleagues in this batch already resolved. Records
+        that already have an email (or no known company domain) get an empty list.
+        """
+        # learn() may be updating the index on the worker thread: read a consistent snapshot
+        index = self.index.snapshot()
+        # Observations from this batch stay out of the persisted index
+        overlay = PatternIndex(path=None, known=index.seen)
+        for first, last, company, email in records:
+            if email:
+                overlay.observe(first, last, company, email)
+
+        suggestions = []
+        for first, last, company, email in records:
+            suggestions.append([] if email else self._rank(first, last, company, index, overlay, top_k))
+        return suggestions
+
+    def _rank(self, first, last, company, index, overlay, top_k):
+        first, last = normalize_name(first), normalize_name(last)
+        key = company_key(company)
+        if not first or not last or not key:
+            return []
+
+        domains = index.company_domains.get(key, Counter()) + overlay.company_domains.get(key, Counter())
+        domain_total = sum(domains.values())
+        scored = {}
+        for domain, domain_count in domains.items():
+            patterns = index.domain_patterns.get(domain, Counter()) + overlay.domain_patterns.get(domain, Counter())
+            pattern_total = sum(patterns.values())
+            for pattern, pattern_count in patterns.items():
+                # +1 in each denominator keeps a single observation from claiming certainty
+                confidence = (domain_count / (domain_total + 1)) * (pattern_count / (pattern_total + 1))
+                email = f"{render_pattern(pattern, first, last)}@{domain}"
+                scored[email] = max(scored.get(email, 0.0), confidence)
+        ranked = sorted(scored.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(email, round(confidence, 4)) for email, confidence in ranked]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_candidate_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = CandidateEngine()
+        return _engine
@@ -1,16 +1,16 @@
 # scraper_filter.py
 import re
-import requests
-from bs4 import BeautifulSoup
+from email_utils.html_document import ParsedDocument, as_document
+
+# Stricter than html_document.EMAIL_REGEX (alphabetic TLD); contact lists keep their historical matches
+CONTACT_REGEX = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
 
 def extract_contacts(html):
-    emails = re.findall(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}", html)
-    return list(set(emails))
+    if isinstance(html, ParsedDocument):
+        html = html.html
+    return list(set(CONTACT_REGEX.findall(html)))
 
 def score_relevance(html, keywords=None):
     if keywords is None:
         keywords = ['wealth management', 'research', 'insights', 'investment strategy', 'team']
-    soup = BeautifulSoup(html, 'html.parser')
-    text = soup.get_text().lower()
-    score = sum(text.count(word.lower()) for word in keywords)
-    return score
+    return sum(as_document(html).keyword_counts(keywords).values())
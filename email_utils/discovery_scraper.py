@@ -1,17 +1,14 @@
 # discovery_scraper.py
-import requests
-from bs4 import BeautifulSoup
+from email_utils.fetch_utils import fetch_text
+from email_utils.html_document import ParsedDocument
 from email_utils.serpapi_utils import get_urls_from_query
 from email_utils.semantic_utils import semantic_score
 
 def get_clean_text(url):
-    try:
-        res = requests.get(url, timeout=5)
-        soup = BeautifulSoup(res.text, 'html.parser')
-        return soup.get_text(separator=" ", strip=True)
-    except Exception as e:
-        print(f"Failed to scrape {url}: {e}")
+    html = fetch_text(url, timeout=5)
+    if not html:
         return ""
+    return ParsedDocument(html).text
 
 def score_urls_from_query(query: str):
     urls = get_urls_from_query(query)
@@ -0,0 +1,108 @@
+# embedding_cache.py
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+CACHE_PATH = os.path.join(os.path.dirname(__file__), "embedding_cache", "contexts.sqlite")
+MAX_ENTRIES = 200_000
+_SQLITE_CHUNK = 500  # stay under SQLite's bound-parameter limit
+
+
+def normalize_text(text):
+    return re.sub(r"\s+", " ", str(text)).strip()
+
+
+def cache_key(text, model_id):
+    return hashlib.sha1(f"{model_id}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed float32 embedding store backed by SQLite.
+    Entries are keyed by hash(normalized text + model id) and evicted least-recently-used
+    once the table grows past max_entries.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT, dim INTEGER, vector BLOB, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+    def lookup(self, texts, model_id):
+        """Return a list aligned with texts holding cached vectors or None for misses."""
+        keys = [cache_key(text, model_id) for text in texts]
+        found = {}
+        try:
+            with self._lock:
+                unique = list(dict.fromkeys(keys))
+                for i in range(0, len(unique), _SQLITE_CHUNK):
+                    chunk = unique[i:i + _SQLITE_CHUNK]
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    found.update({key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows})
+                if found:
+                    now = time.time()
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+                    )
+                    self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"[!] Embedding cache lookup failed: {e}")
+
+        vectors = [found.get(key) for key in keys]
+        hits = sum(vector is not None for vector in vectors)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(vectors) - hits
+        return vectors
+
+    def store(self, texts, vectors, model_id):
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            vector = np.asarray(vector, dtype=np.float32)
+            rows.append((cache_key(text, model_id), model_id, vector.shape[-1], vector.tobytes(), now))
+        try:
+            with self._lock:
+                self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+                self._evict()
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"[!] Embedding cache store failed: {e}")
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)", (overflow,)
+            )
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "entries": entries,
+                "max_entries": self.max_entries,
+            }
@@ -0,0 +1,174 @@
+# fetch_utils.py
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "page_cache")
+CACHE_TTL = 7 * 24 * 3600      # serve cached pages without revalidating for a week
+NEGATIVE_TTL = 15 * 60         # skip hosts that keep timing out for 15 minutes...
+HOST_FAILURE_LIMIT = 3         # ...once this many fetches in a row have failed
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# Offline mode: when set, pages are served only from <fixture dir>/<sha1(url)>.html
+_fixture_dir = os.environ.get("RCM_FETCH_FIXTURES")
+
+_session = None
+_session_lock = threading.Lock()
+_failed_hosts = {}  # host -> (consecutive failures, retry at)
+_failed_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide pooled session so repeated fetches reuse keep-alive connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _session = session
+        return _session
+
+
+def url_key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+# --- Local fixtures (offline testing) ---
+def set_fixture_dir(path):
+    global _fixture_dir
+    _fixture_dir = path
+
+
+def save_fixture(url, text, fixture_dir=None):
+    fixture_dir = fixture_dir or _fixture_dir
+    os.makedirs(fixture_dir, exist_ok=True)
+    with open(os.path.join(fixture_dir, f"{url_key(url)}.html"), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _read_fixture(url):
+    path = os.path.join(_fixture_dir, f"{url_key(url)}.html")
+    if not os.path.exists(path):
+        return ""
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+# --- On-disk response cache ---
+def _cache_path(url):
+    key = url_key(url)
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.json.gz")
+
+
+def _read_cache(url):
+    path = _cache_path(url)
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[!] Dropping unreadable cache entry for {url}: {e}")
+        return None
+
+
+def _write_cache(url, entry):
+    path = _cache_path(url)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[!] Could not cache {url}: {e}")
+
+
+# --- Negative cache for unresponsive hosts ---
+def _host_blocked(host):
+    with _failed_lock:
+        _, retry_at = _failed_hosts.get(host, (0, None))
+        if retry_at is None:
+            return False
+        if retry_at > time.time():
+            return True
+        _failed_hosts.pop(host, None)
+        return False
+
+
+def _mark_host_failed(host):
+    """One timeout can be a slow page; only HOST_FAILURE_LIMIT failures in a row block the host."""
+    with _failed_lock:
+        failures = _failed_hosts.get(host, (0, None))[0] + 1
+        retry_at = time.time() + NEGATIVE_TTL if failures >= HOST_FAILURE_LIMIT else None
+        _failed_hosts[host] = (failures, retry_at)
+
+
+def _mark_host_ok(host):
+    with _failed_lock:
+        _failed_hosts.pop(host, None)
+
+
+def fetch_text(url, timeout=10, ttl=CACHE_TTL, use_cache=True):
+    """
+    Fetch a page's text through the shared session and response cache.
+    Fresh entries are served from disk; stale ones are revalidated with ETag/Last-Modified.
+    Returns "" on failure, falling back to a stale cached copy when one exists.
+    """
+    if _fixture_dir:
+        return _read_fixture(url)
+
+    entry = _read_cache(url) if use_cache else None
+    if entry and time.time() - entry["fetched_at"] < ttl:
+        return entry["text"]
+
+    stale_text = entry["text"] if entry else ""
+    host = urlparse(url).netloc.lower()
+    if _host_blocked(host):
+        return stale_text
+
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = get_session().get(url, timeout=timeout, headers=headers)
+    except (requests.Timeout, requests.ConnectionError) as e:
+        _mark_host_failed(host)
+        print(f"[!] Failed to fetch {url}: {e}")
+        return stale_text
+    except Exception as e:
+        print(f"[!] Failed to fetch {url}: {e}")
+        return stale_text
+
+    _mark_host_ok(host)
+    if response.status_code == 304 and entry:
+        entry["fetched_at"] = time.time()
+        _write_cache(url, entry)
+        return entry["text"]
+    if not response.ok:
+        # e.g. a 5xx or rate limit while revalidating: the stale copy beats nothing
+        return stale_text
+
+    text = response.text
+    if use_cache:
+        _write_cache(url, {
+            "url": url,
+            "text": text,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        })
+    return text
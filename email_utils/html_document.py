@@ -0,0 +1,80 @@
+# html_document.py
+import re
+from functools import cached_property
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    _BS4_PARSER = "lxml"
+except ImportError:
+    _BS4_PARSER = "html.parser"
+
+EMAIL_REGEX = re.compile(r"[a-zA-Z0-9_.+\-]+@[a-zA-Z0-9\-]+\.[a-zA-Z0-9.\-]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _extract_text(html):
+    """Visible text with script/style dropped, using the fastest parser available."""
+    if HTMLParser is not None:
+        tree = HTMLParser(html)
+        for node in tree.css("script, style"):
+            node.decompose()
+        return tree.text(separator=" ", strip=True)
+    soup = BeautifulSoup(html, _BS4_PARSER)
+    for node in soup(["script", "style"]):
+        node.decompose()
+    return soup.get_text(separator=" ", strip=True)
+
+
+class ParsedDocument:
+    """
+    A page parsed once and shared by every extractor: cleaned text, email matches with
+    offsets, name-mention offsets and keyword counts.
+    """
+
+    def __init__(self, html):
+        self.html = html or ""
+        self.text = _WHITESPACE.sub(" ", _extract_text(self.html)).strip() if self.html else ""
+        self.lower_text = self.text.lower()
+        self._name_offsets = {}
+
+    @cached_property
+    def email_matches(self):
+        """(email, start, end) for every email in the cleaned text."""
+        return [(m.group(), m.start(), m.end()) for m in EMAIL_REGEX.finditer(self.text)]
+
+    @cached_property
+    def emails(self):
+        """Unique emails on the page, including ones only present in markup (e.g. mailto: links)."""
+        found = dict.fromkeys(email for email, _, _ in self.email_matches)
+        found.update(dict.fromkeys(EMAIL_REGEX.findall(self.html)))
+        return list(found)
+
+    def name_offsets(self, name):
+        key = name.lower()
+        if key not in self._name_offsets:
+            self._name_offsets[key] = [m.start() for m in re.finditer(re.escape(key), self.lower_text)]
+        return self._name_offsets[key]
+
+    def snippets(self, name, window=250):
+        snippets = [self.text[max(0, idx - window): idx + window] for idx in self.name_offsets(name)]
+        return snippets or [self.text[:1000]]  # fallback: first 1,000 chars if name not found
+
+    def email_contexts(self, window=250):
+        return [
+            (email, self.text[max(0, start - window): end + window])
+            for email, start, end in self.email_matches
+        ]
+
+    def keyword_counts(self, keywords):
+        return {keyword: self.lower_text.count(keyword.lower()) for keyword in keywords}
+
+
+def as_document(html):
+    return html if isinstance(html, ParsedDocument) else ParsedDocument(html)
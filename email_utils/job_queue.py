@@ -0,0 +1,369 @@
+# job_queue.py
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+import pandas as pd
+
+from email_utils.batch_pipeline import run_batch_discovery
+from email_utils.candidate_engine import get_candidate_engine
+from email_utils.analytics_utils import WordFrequencyTracker, get_all_time_tracker
+
+JOBS_DB = os.path.join(os.path.dirname(__file__), 'batch_jobs.sqlite')
+POLL_INTERVAL = 2.0  # seconds the idle worker waits before checking for new jobs
+TOP_CANDIDATES = 5   # ranked candidates kept per row
+CLAIM_TIMEOUT = 120.0  # seconds a running job may go without a heartbeat before another worker takes it over
+HEARTBEAT_INTERVAL = 20.0  # how often the worker running a job refreshes its claim
+
+
+class ClaimLost(Exception):
+    """Another worker took over the job this worker was running."""
+
+
+class _ClaimHeartbeat:
+    """
+    Refreshes a claimed job's `updated` time from its own thread, so model loading or a slow
+    batch of searches never looks like a crashed worker. Sets `lost` once the claim is gone.
+    """
+
+    def __init__(self, connect, job_id, token, interval=HEARTBEAT_INTERVAL):
+        self._connect = connect
+        self.job_id = job_id
+        self.token = token
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, args=(interval,), daemon=True)
+
+    def _beat(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                conn = self._connect()
+                try:
+                    claimed = conn.execute(
+                        "UPDATE jobs SET updated = ? WHERE id = ? AND claim = ?", (time.time(), self.job_id, self.token)
+                    ).rowcount
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                print(f"[!] Heartbeat for batch job {self.job_id} failed: {e}")
+                continue
+            if not claimed:
+                self.lost.set()
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class JobQueue:
+    """
+    SQLite-backed queue for batch email searches. submit() stores every input row; one
+    worker thread per process runs queued jobs through run_batch_discovery and writes each
+    row's result as soon as it is scored. A worker claims a job with a conditional UPDATE and
+    a claim token, so several server processes never run the same job. While it runs the job a
+    heartbeat keeps the claim fresh; a job left 'running' by a crash is claimed again once it
+    has had no heartbeat for CLAIM_TIMEOUT seconds and continues with the rows that have no
+    result yet.
+    """
+
+    def __init__(self, path=JOBS_DB, poll_interval=POLL_INTERVAL):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._init_db()
+        self._thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, name TEXT, fingerprint TEXT, columns TEXT, status TEXT, "
+                "total INTEGER, done INTEGER, error TEXT, stats TEXT, created REAL, updated REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_rows ("
+                "job_id TEXT, position INTEGER, input TEXT, status TEXT, found_email TEXT, score REAL, "
+                "candidates TEXT, error TEXT, PRIMARY KEY (job_id, position))"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS job_words (job_id TEXT PRIMARY KEY, sketch TEXT)")
+            if "suggestions" not in {row[1] for row in conn.execute("PRAGMA table_info(job_rows)")}:
+                conn.execute("ALTER TABLE job_rows ADD COLUMN suggestions TEXT")
+            # Queues created before jobs were scoped to their submitter and claimed by token
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("claim", "TEXT"), ("adaptive", "INTEGER DEFAULT 0")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_owner ON jobs(owner, created)")
+        finally:
+            conn.close()
+
+    # --- Submitting and reading jobs (UI side) ---
+
+    def submit(self, df, name=None, fingerprint=None, owner=None, rerun=False, adaptive=False):
+        """
+        Queue df's rows for owner. An upload this owner already queued, ran or finished returns
+        its existing job, unless rerun asks for a fresh search of every row. adaptive stops
+        fetching a row's pages once an email is confident (fewer page loads, may miss a better hit).
+        """
+        conn = self._connect()
+        try:
+            if fingerprint and not rerun:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE fingerprint = ? AND owner IS ? AND status != 'failed' "
+                    "ORDER BY created DESC LIMIT 1",
+                    (fingerprint, owner)
+                ).fetchone()
+                if row:
+                    return row[0]
+
+            job_id = uuid.uuid4().hex[:12]
+            now = time.time()
+            records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO jobs (id, name, fingerprint, columns, status, total, done, created, updated, owner, adaptive) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, 0, ?, ?, ?, ?)",
+                (job_id, name, fingerprint, json.dumps([str(col) for col in df.columns]), len(df), now, now, owner,
+                 int(adaptive))
+            )
+            conn.executemany(
+                "INSERT INTO job_rows (job_id, position, input, status) VALUES (?, ?, ?, 'pending')",
+                [(job_id, position, json.dumps(record, default=str)) for position, record in enumerate(records)]
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        self._wake.set()
+        return job_id
+
+    def get_job(self, job_id):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT id, name, status, total, done, error, stats, created, updated FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        keys = ["id", "name", "status", "total", "done", "error", "stats", "created", "updated"]
+        job = dict(zip(keys, row))
+        job["stats"] = json.loads(job["stats"]) if job["stats"] else None
+        return job
+
+    def list_jobs(self, owner, limit=10):
+        """Most recent jobs submitted by owner; other users' uploads are never listed."""
+        conn = self._connect()
+        try:
+            ids = [row[0] for row in conn.execute(
+                "SELECT id FROM jobs WHERE owner IS ? ORDER BY created DESC LIMIT ?", (owner, limit)
+            ).fetchall()]
+        finally:
+            conn.close()
+        return [self.get_job(job_id) for job_id in ids]
+
+    def results(self, job_id):
+        """
+        Input rows in upload order with Found Email / Score filled in for finished rows.
+        Suggested emails are stored once the whole job is done and stay blank until then.
+        """
+        conn = self._connect()
+        try:
+            df, suggestions = self._read_results(conn, job_id)
+            status = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            if status == "done" and len(df) and all(ranked is None for ranked in suggestions):
+                # Finished before suggestions were stored with the job: work them out once
+                suggestions = self._save_suggestions(conn, job_id, df)
+        finally:
+            conn.close()
+        df["Suggested Email"] = [ranked[0][0] if ranked else "" for ranked in suggestions]
+        df["Suggestion Confidence"] = [ranked[0][1] if ranked else None for ranked in suggestions]
+        df["Other Suggestions"] = [", ".join(email for email, _ in (ranked or [])[1:]) for ranked in suggestions]
+        return df
+
+    def _read_results(self, conn, job_id):
+        columns = json.loads(conn.execute("SELECT columns FROM jobs WHERE id = ?", (job_id,)).fetchone()[0])
+        rows = conn.execute(
+            "SELECT input, found_email, score, suggestions FROM job_rows WHERE job_id = ? ORDER BY position",
+            (job_id,)
+        ).fetchall()
+        df = pd.DataFrame([json.loads(row[0]) for row in rows], columns=columns)
+        df["Found Email"] = [row[1] or "" for row in rows]
+        df["Score"] = [row[2] for row in rows]
+        return df, [json.loads(row[3]) if row[3] is not None else None for row in rows]
+
+    def _save_suggestions(self, conn, job_id, df):
+        """Rows with no email on any page get a guess from their colleagues' address pattern."""
+        suggestions = get_candidate_engine().suggest(_person_records(df))
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "UPDATE job_rows SET suggestions = ? WHERE job_id = ? AND position = ?",
+            [(json.dumps(ranked), job_id, position) for position, ranked in enumerate(suggestions)]
+        )
+        conn.execute("COMMIT")
+        return suggestions
+
+    def word_frequencies(self, job_id, top_n=20):
+        """Most common snippet words for a job (approximate top-k, updated as rows finish)."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT sketch FROM job_words WHERE job_id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return WordFrequencyTracker.from_json(row[0]).most_common(top_n) if row else []
+
+    # --- Worker ---
+
+    def _save_words(self, conn, job_id, words):
+        conn.execute("INSERT OR REPLACE INTO job_words VALUES (?, ?)", (job_id, words.to_json()))
+
+    def _claim_next_job(self, conn):
+        """Take the next runnable job for this worker; returns (job id, claim token) or None."""
+        now = time.time()
+        stale = now - CLAIM_TIMEOUT
+        runnable = "(status = 'queued' OR (status = 'running' AND updated < ?))"
+        # Interrupted jobs first, so a restart finishes what it was doing
+        candidates = conn.execute(
+            f"SELECT id FROM jobs WHERE {runnable} ORDER BY status = 'running' DESC, created LIMIT 5", (stale,)
+        ).fetchall()
+        for (job_id,) in candidates:
+            token = uuid.uuid4().hex
+            # Only one worker's UPDATE can match; the others see rowcount 0 and move on
+            cursor = conn.execute(
+                f"UPDATE jobs SET status = 'running', claim = ?, updated = ? WHERE id = ? AND {runnable}",
+                (token, now, job_id, stale)
+            )
+            if cursor.rowcount == 1:
+                return job_id, token
+        return None
+
+    def _set_status(self, conn, job_id, token, status, **fields):
+        assignments = ", ".join(["status = ?", "updated = ?"] + [f"{key} = ?" for key in fields])
+        cursor = conn.execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ? AND claim = ?",
+            (status, time.time(), *fields.values(), job_id, token)
+        )
+        if cursor.rowcount != 1:
+            raise ClaimLost(job_id)
+
+    def _run_job(self, conn, job_id, token, lost):
+        pending = conn.execute(
+            "SELECT position, input FROM job_rows WHERE job_id = ? AND status = 'pending' ORDER BY position",
+            (job_id,)
+        ).fetchall()
+        positions = [position for position, _ in pending]
+        df = pd.DataFrame([json.loads(payload) for _, payload in pending])
+
+        # Batch word counts continue from the last finished row when a job resumes
+        row = conn.execute("SELECT sketch FROM job_words WHERE job_id = ?", (job_id,)).fetchone()
+        words = WordFrequencyTracker.from_json(row[0]) if row else WordFrequencyTracker()
+
+        def _on_result(index, result):
+            scored = result["scored"] or []
+            best_email, _, best_score = scored[0] if scored else ("", None, None)
+            candidates = [[email, score] for email, _, score in scored[:TOP_CANDIDATES]]
+            words.update_many(result.get("context_blocks") or [])
+            conn.execute("BEGIN IMMEDIATE")
+            # Bumping done doubles as a heartbeat; it only matches while this worker holds the claim
+            claimed = conn.execute(
+                "UPDATE jobs SET done = done + 1, updated = ? WHERE id = ? AND claim = ?", (time.time(), job_id, token)
+            ).rowcount
+            if not claimed:
+                conn.execute("ROLLBACK")
+                raise ClaimLost(job_id)
+            conn.execute(
+                "UPDATE job_rows SET status = 'done', found_email = ?, score = ?, candidates = ?, error = ? "
+                "WHERE job_id = ? AND position = ?",
+                (best_email, best_score, json.dumps(candidates), result.get("error"), job_id, positions[index])
+            )
+            # Same transaction as the row: a resumed job neither loses nor recounts its words
+            self._save_words(conn, job_id, words)
+            conn.execute("COMMIT")
+
+        stats = None
+        if len(df):
+            adaptive = bool(conn.execute("SELECT adaptive FROM jobs WHERE id = ?", (job_id,)).fetchone()[0])
+            # Losing the claim cancels the rows not started yet instead of searching them twice
+            _, stats = run_batch_discovery(df, on_result=_on_result, adaptive=adaptive, cancel=lost)
+            if lost.is_set():
+                raise ClaimLost(job_id)
+
+        # Feed every confirmed email (including rows finished before a restart) to the pattern index,
+        # then guess the rest once here rather than on every results() poll
+        found, _ = self._read_results(conn, job_id)
+        get_candidate_engine().learn(_person_records(found))
+        self._save_suggestions(conn, job_id, found)
+
+        self._save_words(conn, job_id, words)
+        all_time = get_all_time_tracker()
+        all_time.merge(words)
+        all_time.save()
+        self._set_status(conn, job_id, token, "done", **({"stats": json.dumps(stats.summary())} if stats else {}))
+
+    def _worker_loop(self):
+        while True:
+            conn = self._connect()
+            try:
+                job = self._claim_next_job(conn)
+                if job:
+                    job_id, token = job
+                    try:
+                        with _ClaimHeartbeat(self._connect, job_id, token) as heartbeat:
+                            self._run_job(conn, job_id, token, heartbeat.lost)
+                    except ClaimLost:
+                        print(f"[!] Batch job {job_id} was taken over by another worker")
+                        if conn.in_transaction:
+                            conn.execute("ROLLBACK")
+                    except Exception as e:
+                        print(f"[!] Batch job {job_id} failed: {e}")
+                        if conn.in_transaction:
+                            conn.execute("ROLLBACK")
+                        try:
+                            self._set_status(conn, job_id, token, "failed", error=str(e))
+                        except ClaimLost:
+                            pass
+            except sqlite3.Error as e:
+                print(f"[!] Job queue error: {e}")
+                job = None
+            finally:
+                conn.close()
+            if not job:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+def _person_records(df):
+    """(first, last, company, email) per row, as the candidate engine expects."""
+    def column(name):
+        return df[name].tolist() if name in df.columns else [None] * len(df)
+    return list(zip(column("First Name"), column("Last Name"), column("Company"), column("Found Email")))
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Process-wide queue: Streamlit reruns and sessions share one worker thread."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
@@ -0,0 +1,112 @@
+# onnx_backend.py
+# Int8 ONNX Runtime encoder for the SBERT model. Exported and quantized once per model,
+# then served without torch: tokenizers + onnxruntime + NumPy mean pooling.
+import os
+import threading
+import numpy as np
+
+ONNX_DIR = os.path.join(os.path.dirname(__file__), "embedding_cache", "onnx")
+MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2's max_seq_length
+BACKEND_ID = "onnx-int8"
+
+_export_lock = threading.Lock()
+
+
+def model_dir(model_name):
+    return os.path.join(ONNX_DIR, model_name.replace("/", "__"))
+
+
+def export_quantized(model_name, out_dir=None):
+    """Export the transformer to ONNX and write a dynamically int8-quantized copy next to it."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    hub_name = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    out_dir = out_dir or model_dir(model_name)
+    os.makedirs(out_dir, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(hub_name)
+    model = AutoModel.from_pretrained(hub_name)
+    model.eval()
+    tokenizer.save_pretrained(out_dir)
+
+    dummy = tokenizer(["export"], return_tensors="pt")
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "token_type_ids": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=14,
+        )
+    quantize_dynamic(fp32_path, os.path.join(out_dir, "model_int8.onnx"), weight_type=QuantType.QInt8)
+    return out_dir
+
+
+class OnnxEncoder:
+    """
+    Drop-in for the parts of SentenceTransformer that semantic_utils uses: encode() with
+    batch_size / convert_to_numpy / convert_to_tensor and a device attribute.
+    Embeddings are mean-pooled over the attention mask and L2-normalized, as in the
+    sentence-transformers pipeline for this model.
+    """
+
+    device = "cpu"
+
+    def __init__(self, model_name, num_threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        directory = model_dir(model_name)
+        model_path = os.path.join(directory, "model_int8.onnx")
+        with _export_lock:
+            if not os.path.exists(model_path):
+                export_quantized(model_name, directory)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(directory, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = int(num_threads)
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, convert_to_tensor=False, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else [str(text) for text in texts]
+        batches = [self._encode_batch(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+        embeddings = np.vstack(batches).astype(np.float32) if batches else np.zeros((0, 0), dtype=np.float32)
+        if single:
+            embeddings = embeddings[0]
+        if convert_to_tensor:
+            import torch
+            return torch.from_numpy(embeddings)
+        return embeddings
+
+
+def load_onnx_encoder(model_name, num_threads=None):
+    """Raises ImportError / OSError / RuntimeError when onnxruntime or the export is unavailable."""
+    return OnnxEncoder(model_name, num_threads=num_threads)
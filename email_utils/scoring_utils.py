@@ -1,19 +1,44 @@
-from email_utils.semantic_utils import embed_text, semantic_score
+from email_utils.semantic_utils import embed_text, semantic_scores
+from email_utils.scraper_utils import MATCH_LOOSE, MATCH_STRONG
 
-def score_candidates(email_contexts, reference_embeddings):
-    results = []
-    for email, context in email_contexts:
-        try:
-            score = semantic_score(context, reference_embeddings)
+def score_candidates(email_contexts, reference_embeddings, batch_size=32):
+    return score_candidate_batches([email_contexts], reference_embeddings, batch_size=batch_size)[0]
+
+def _unpack(candidate):
+    """(email, context[, grade[, source rank]]) -> (email, context, grade, source rank)."""
+    email, context, *extra = candidate
+    extra += [None] * (2 - len(extra))
+    return email, context, extra[0], extra[1]
+
+def score_candidate_batches(batches, reference_embeddings, batch_size=32):
+    """
+    Score several candidate lists (e.g. one per person) with a single encode call.
+    Candidates are (email, context), optionally followed by a match grade and the search
+    result's source rank; those get the bonuses from combine_confidence.
+    Returns one list of (email, context, score) per input batch, ranked by score.
+    """
+    valid = [[_unpack(candidate) for candidate in batch if isinstance(candidate[1], str)] for batch in batches]
+    contexts = [context for batch in valid for _, context, _, _ in batch]
+    scores = iter(semantic_scores(contexts, reference_embeddings, batch_size=batch_size))
+
+    ranked = []
+    for batch in valid:
+        results = []
+        for email, context, grade, source_rank in batch:
+            score = next(scores)
+            if grade is not None or source_rank is not None:
+                score = combine_confidence(score, pattern_match=grade, source_rank=source_rank)
             results.append((email, context, score))
-        except Exception:
-            continue
-    return sorted(results, key=lambda x: x[2], reverse=True)
+        ranked.append(sorted(results, key=lambda x: x[2], reverse=True))
+    return ranked
 
 def combine_confidence(semantic_score, pattern_match=False, source_rank=None):
+    """pattern_match is a bool or a NameMatcher grade; a loose match earns half the bonus."""
     base = semantic_score
-    if pattern_match:
+    if pattern_match is True or pattern_match == MATCH_STRONG:
         base += 0.1
+    elif pattern_match == MATCH_LOOSE:
+        base += 0.05
     if source_rank is not None:
         base += max(0, 0.1 - 0.01 * source_rank)
     return round(min(base, 1.0), 4)
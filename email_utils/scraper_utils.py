@@ -1,7 +1,9 @@
 import re
-import requests
 import pandas as pd
-from email_utils.serpapi_utils import google_search_results
+from collections.abc import Mapping
+from email_utils.fetch_utils import fetch_text
+from email_utils.html_document import EMAIL_REGEX, ParsedDocument, as_document
+from email_utils.serpapi_utils import cached_search
 from email_utils.usage_counter import increment_api_count, get_api_count, get_api_quota
 
 # Wide array of patterns, no domain attached
@@ -19,30 +21,28 @@ def generate_email_usernames(first, last):
         for pattern in USERNAME_PATTERNS
     ))
 
-def run_reverse_search(first, last, company, title=None, max_results=10, bulk=False):
+def run_reverse_search(first, last, company, title=None, max_results=10, bulk=False, reservation=None):
     query_parts = [f'"{first} {last}"', company, title]
     filtered_parts = [str(part) for part in query_parts if part and not pd.isna(part)]
     query = " ".join(filtered_parts)
-    serp_results = google_search_results(query, max_results=max_results)
-    increment_api_count("serpapi")
+    serp_results, from_cache = cached_search(query, max_results=max_results)
+    if not from_cache and not (reservation and reservation.use()):
+        increment_api_count("serpapi")
     # Always return SerpAPI status
-    return serp_results, {"api": "serpapi", "fallback": False, "count": get_api_count("serpapi"), "quota": get_api_quota("serpapi")}
+    return serp_results, {"api": "serpapi", "fallback": False, "cached": from_cache, "count": get_api_count("serpapi"), "quota": get_api_quota("serpapi")}
 
 
 def fetch_html_from_url(url):
-    try:
-        response = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
-        if response.ok:
-            return response.text
-    except Exception as e:
-        print(f"[!] Failed to fetch {url}: {e}")
-    return ""
+    return fetch_text(url, timeout=10)
 
 def extract_all_emails(html):
-    EMAIL_REGEX = r"[a-zA-Z0-9_.+\-]+@[a-zA-Z0-9\-]+\.[a-zA-Z0-9.\-]+"
-    return list(set(re.findall(EMAIL_REGEX, html)))
+    if isinstance(html, ParsedDocument):
+        return list(html.emails)
+    return list(set(EMAIL_REGEX.findall(html)))
 
 def extract_named_snippets(html, name, window=250):
+    if isinstance(html, ParsedDocument):
+        return html.snippets(name, window=window)
     clean_text = re.sub(r'\s+', ' ', html)
     lower_text = clean_text.lower()
     name_lower = name.lower()
@@ -52,28 +52,103 @@ def extract_named_snippets(html, name, window=250):
 
     return snippets or [clean_text[:1000]]  # fallback: first 1,000 chars if name not found
 
-def match_username_to_name(username, first, last):
-    username = username.lower()
-    first, last = first.lower(), last.lower()
-    f, l = first[0], last[0]
+def extract_candidates(html, first, last, matcher=None):
+    """
+    Return (email, context, match grade) candidates whose username matches the person, plus
+    the name snippets. Pass a NameMatcher to reuse it across a person's pages.
+    """
+    doc = as_document(html)
+    matcher = matcher or NameMatcher(first, last)
+    snippets = extract_named_snippets(doc, f"{first} {last}")
+    emails = extract_all_emails(doc)
+    usernames = [email.split("@")[0] for email in emails]
+    candidates = []
+    for email, username, grade in zip(emails, usernames, matcher.classify(usernames)):
+        if grade != MATCH_NONE:
+            context = next((s for s in snippets if username in s),
+                           snippets[0] if snippets else "")
+            candidates.append((email, context, grade))
+    return candidates, snippets
+
+def normalize_search_results(obj):
+    """Flatten nested lists/tuples and normalize to dicts with 'link','title','snippet'."""
+    def walk(x):
+        if isinstance(x, (list, tuple)):
+            for y in x:
+                yield from walk(y)
+        else:
+            yield x
+
+    out = []
+    for item in walk(obj or []):
+        if isinstance(item, Mapping):
+            link = item.get("link") or item.get("url") or item.get("href")
+            if link:
+                out.append({
+                    "link": link,
+                    "title": item.get("title") or item.get("name") or "",
+                    "snippet": item.get("snippet") or item.get("description") or "",
+                })
+        elif isinstance(item, str):
+            # If a raw URL string slips through
+            out.append({"link": item, "title": "", "snippet": ""})
+
+    # Dedupe by link
+    seen, dedup = set(), []
+    for d in out:
+        if d["link"] not in seen:
+            seen.add(d["link"])
+            dedup.append(d)
+    return dedup
+
+# Match grades, ordered so they can be compared and summed
+MATCH_NONE, MATCH_LOOSE, MATCH_STRONG = 0, 1, 2
 
-    # Strong exact-style matches
-    if username in {
-        f"{first}.{last}", f"{first}_{last}", f"{first}{last}",
-        f"{f}{last}", f"{last}{f}", f"{last}.{first}"
-    }:
-        return True
-
-    # Loose pattern matches
-    if first in username and last in username:
-        return True
-    if username.startswith(f + last) or username.startswith(last + f):
-        return True
-    if username.startswith(first) and last[0] in username:
-        return True
-    if username.startswith(f) and last in username:
-        return True
-    if username.startswith(first[:3]) and last[:3] in username:
-        return True
-
-    return False
+
+class NameMatcher:
+    """
+    Username matching for one person, built once and reused for every address on every page.
+    Strong forms (jane.smith, jsmith, ...) are precomputed into a set; the loose rules are
+    folded into one compiled regex.
+    """
+
+    def __init__(self, first, last):
+        self.first, self.last = str(first).lower(), str(last).lower()
+        first, last = self.first, self.last
+        if not first or not last:
+            self.strong, self.loose = frozenset(), None
+            return
+        f, l = first[0], last[0]
+        self.strong = frozenset({
+            f"{first}.{last}", f"{first}_{last}", f"{first}{last}",
+            f"{f}{last}", f"{last}{f}", f"{last}.{first}"
+        })
+        first, last, f, l = (re.escape(x) for x in (first, last, f, l))
+        first3, last3 = re.escape(self.first[:3]), re.escape(self.last[:3])
+        self.loose = re.compile(
+            "^(?:"
+            f"(?=.*{first})(?=.*{last})"   # both names anywhere
+            f"|{f}{last}|{last}{f}"        # starts with jsmith / smithj
+            f"|(?=.*{l}){first}"           # starts with first name, last initial anywhere
+            f"|(?=.*{last}){f}"            # starts with first initial, last name anywhere
+            f"|(?=.*{last3}){first3}"      # starts with 3 letters of first, 3 of last anywhere
+            ")",
+            re.DOTALL
+        )
+
+    def grade(self, username):
+        username = username.lower()
+        if username in self.strong:
+            return MATCH_STRONG
+        if self.loose is not None and self.loose.match(username):
+            return MATCH_LOOSE
+        return MATCH_NONE
+
+    def classify(self, usernames):
+        """Grades aligned with usernames; repeated usernames are only evaluated once."""
+        grades = {username: self.grade(username) for username in set(usernames)}
+        return [grades[username] for username in usernames]
+
+
+def match_username_to_name(username, first, last):
+    return NameMatcher(first, last).grade(username) != MATCH_NONE
@@ -1,7 +1,23 @@
-from sentence_transformers import SentenceTransformer, util
+import os
+import hashlib
+import threading
+import numpy as np
+from email_utils.embedding_cache import EmbeddingCache
 
-# Load SBERT model once
-_model = SentenceTransformer("all-MiniLM-L6-v2")
+MODEL_NAME = "all-MiniLM-L6-v2"
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "embedding_cache")
+
+# Inference backend: "torch" (SentenceTransformer, fp32) or "onnx" (onnxruntime, int8)
+EMBED_BACKEND = os.environ.get("RCM_EMBED_BACKEND", "torch").lower()
+
+# SBERT model, built on first use: importing this module must not pull in torch
+_model = None
+_model_id = None
+_model_lock = threading.Lock()
+
+# Shared on-disk cache for context embeddings, opened on first use
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
 
 # Centralized domain reference phrases (editable in one place only)
 _REFERENCE_PHRASES = [
@@ -13,21 +29,149 @@ _REFERENCE_PHRASES = [
     "alternative investments"
 ]
 
+# Named phrase sets (e.g. a muni or alts persona); each is embedded and cached separately
+_PHRASE_SETS = {"default": _REFERENCE_PHRASES}
+_reference_cache = {}
+_reference_lock = threading.Lock()
+
+def _build_model(backend):
+    """Returns (encoder, model id). ONNX falls back to PyTorch when onnxruntime or the export fails."""
+    if backend == "onnx":
+        try:
+            from email_utils.onnx_backend import BACKEND_ID, load_onnx_encoder
+            return load_onnx_encoder(MODEL_NAME), f"{MODEL_NAME}-{BACKEND_ID}"
+        except Exception as e:
+            print(f"[!] ONNX backend unavailable, falling back to PyTorch: {e}")
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODEL_NAME), MODEL_NAME
+
 def get_model():
+    global _model, _model_id
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model, _model_id = _build_model(EMBED_BACKEND)
     return _model
 
-def get_reference_phrases():
-    return _REFERENCE_PHRASES
+def get_model_id():
+    """Identifies model + backend; embeddings from different backends are cached separately."""
+    get_model()
+    return _model_id
+
+def register_reference_phrases(name, phrases):
+    _PHRASE_SETS[name] = list(phrases)
+
+def get_reference_phrases(name="default"):
+    return _PHRASE_SETS[name]
+
+def _reference_key(phrases):
+    digest = hashlib.sha1("\n".join(phrases).encode("utf-8")).hexdigest()[:16]
+    return f"{get_model_id()}-{digest}"
+
+def uses_torch():
+    """False when the ONNX encoder is serving: embeddings then stay NumPy and torch is never imported."""
+    from email_utils.onnx_backend import OnnxEncoder
+    return not isinstance(get_model(), OnnxEncoder)
+
+def _as_backend_array(embeddings):
+    """NumPy embeddings as the active backend's array type (a torch tensor on the model's device)."""
+    if not uses_torch():
+        return embeddings
+    import torch
+    return torch.from_numpy(embeddings).to(get_model().device)
+
+def _load_or_encode_reference(key, phrases):
+    path = os.path.join(CACHE_DIR, f"reference_{key}.npy")
+    if os.path.exists(path):
+        try:
+            return _as_backend_array(np.load(path))
+        except Exception as e:
+            print(f"[!] Could not load reference embeddings from {path}: {e}")
 
-def get_reference_embeddings():
-    return _model.encode(_REFERENCE_PHRASES, convert_to_tensor=True)
+    embeddings = np.asarray(get_model().encode(phrases, convert_to_numpy=True), dtype=np.float32)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        np.save(path, embeddings)
+    except OSError as e:
+        print(f"[!] Could not persist reference embeddings to {path}: {e}")
+    return _as_backend_array(embeddings)
+
+def get_reference_embeddings(name="default"):
+    """Embeddings for a named phrase set, keyed by phrase content and model; encoded once per process."""
+    phrases = get_reference_phrases(name)
+    key = _reference_key(phrases)
+    with _reference_lock:
+        if key not in _reference_cache:
+            _reference_cache[key] = _load_or_encode_reference(key, phrases)
+        return _reference_cache[key]
+
+def precompute_reference_embeddings():
+    for name in list(_PHRASE_SETS):
+        get_reference_embeddings(name)
+
+def get_embedding_cache():
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache()
+    return _embedding_cache
+
+def get_embedding_cache_stats():
+    return get_embedding_cache().stats()
 
 def embed_text(text):
-    return _model.encode(text, convert_to_tensor=True)
+    return embed_texts([text])[0]
+
+def embed_texts(texts, batch_size=32, convert_to_numpy=False):
+    """
+    Encode texts, serving repeats from the embedding cache and encoding only the misses.
+    Returns the backend's array type (torch tensor, or NumPy under ONNX) unless convert_to_numpy.
+    """
+    model = get_model()
+    texts = list(texts)
+    if not texts:
+        empty = np.zeros((0, 0), dtype=np.float32)
+        return empty if convert_to_numpy else _as_backend_array(empty)
+
+    cache = get_embedding_cache()
+    vectors = cache.lookup(texts, get_model_id())
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        missing_texts = [texts[i] for i in missing]
+        encoded = model.encode(missing_texts, batch_size=batch_size, convert_to_numpy=True)
+        cache.store(missing_texts, encoded, get_model_id())
+        for i, vector in zip(missing, encoded):
+            vectors[i] = vector
+    embeddings = np.stack(vectors).astype(np.float32)
+    return embeddings if convert_to_numpy else _as_backend_array(embeddings)
+
+def cos_sim(a, b):
+    """Cosine similarity matrix; NumPy for NumPy inputs, sentence-transformers' util for tensors."""
+    if isinstance(a, np.ndarray) and isinstance(b, np.ndarray):
+        a, b = np.atleast_2d(a), np.atleast_2d(b)
+        a = a / np.clip(np.linalg.norm(a, axis=1, keepdims=True), 1e-12, None)
+        b = b / np.clip(np.linalg.norm(b, axis=1, keepdims=True), 1e-12, None)
+        return a @ b.T
+    from sentence_transformers import util
+    return util.cos_sim(a, b)
 
 def semantic_score(text, reference_embeddings=None):
     if reference_embeddings is None:
         reference_embeddings = get_reference_embeddings()
     embedding = embed_text(text)
-    cosine_scores = util.cos_sim(embedding, reference_embeddings)
+    cosine_scores = cos_sim(embedding, reference_embeddings)
     return float(cosine_scores.max())
+
+def semantic_scores(texts, reference_embeddings=None, batch_size=32):
+    """Score many texts with one encode call and a single similarity matrix."""
+    texts = list(texts)
+    if not texts:
+        return []
+    if reference_embeddings is None:
+        reference_embeddings = get_reference_embeddings()
+    embeddings = embed_texts(texts, batch_size=batch_size)
+    cosine_scores = cos_sim(embeddings, reference_embeddings)
+    if isinstance(cosine_scores, np.ndarray):
+        return cosine_scores.max(axis=1).tolist()
+    return cosine_scores.max(dim=1).values.tolist()
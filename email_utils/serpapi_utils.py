@@ -1,16 +1,115 @@
-import requests
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import Future
+from email_utils.fetch_utils import get_session
 from rcm_secrets import SERPAPI_KEY, MAX_RESULTS
 
-def google_search_results(query, max_results=5):
+CACHE_PATH = os.path.join(os.path.dirname(__file__), "serpapi_cache.sqlite")
+CACHE_TTL = 30 * 24 * 3600  # reuse identical queries for a month
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def normalize_query(query):
+    return re.sub(r"\s+", " ", str(query)).strip().lower()
+
+
+# --- Persistent query-result cache ---
+def _connect():
+    conn = sqlite3.connect(CACHE_PATH, timeout=10)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS serp_cache ("
+        "query TEXT, max_results INTEGER, results TEXT, fetched_at REAL, "
+        "PRIMARY KEY (query, max_results))"
+    )
+    return conn
+
+
+def _cache_get(key, ttl):
+    try:
+        with _connect() as conn:
+            row = conn.execute(
+                "SELECT results, fetched_at FROM serp_cache WHERE query = ? AND max_results = ?", key
+            ).fetchone()
+    except sqlite3.Error as e:
+        print(f"SERPAPI cache read failed: {e}")
+        return None
+    if row and time.time() - row[1] < ttl:
+        return json.loads(row[0])
+    return None
+
+
+def _cache_put(key, results):
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO serp_cache VALUES (?, ?, ?, ?)",
+                (*key, json.dumps(results), time.time())
+            )
+    except sqlite3.Error as e:
+        print(f"SERPAPI cache write failed: {e}")
+
+
+def _request_results(query, max_results):
+    """Returns (results, ok); failed requests are not cached."""
     params = {
         "engine": "google",
         "q": query,
         "api_key": SERPAPI_KEY
     }
     try:
-        response = requests.get("https://serpapi.com/search", params=params, timeout=10)
+        response = get_session().get("https://serpapi.com/search", params=params, timeout=10)
         data = response.json()
-        return data.get("organic_results", [])[:max_results]
+        return data.get("organic_results", [])[:max_results], response.ok
     except Exception as e:
         print(f"SERPAPI failed: {e}")
-        return []
+        return [], False
+
+
+def cached_search(query, max_results=5, ttl=CACHE_TTL):
+    """
+    Returns (results, from_cache). Identical in-flight queries are coalesced so only
+    one request is sent; callers that piggyback on it also get from_cache=True.
+    """
+    key = (normalize_query(query), max_results)
+    cached = _cache_get(key, ttl)
+    if cached is not None:
+        return cached, True
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _inflight[key] = future
+    if not owner:
+        return future.result(), True
+
+    try:
+        # Another worker may have finished the same query between the cache check and here
+        cached = _cache_get(key, ttl)
+        if cached is not None:
+            future.set_result(cached)
+            return cached, True
+        results, ok = _request_results(query, max_results)
+        if ok:
+            _cache_put(key, results)
+        future.set_result(results)
+        return results, False
+    except BaseException as e:
+        # Waiters would otherwise block forever on a future nobody resolves
+        if not future.done():
+            future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def google_search_results(query, max_results=5):
+    return cached_search(query, max_results=max_results)[0]
@@ -1,46 +1,214 @@
 import os
 import json
+import atexit
+import sqlite3
+import threading
+from collections import defaultdict
 from datetime import datetime
 
-COUNTER_FILE = os.path.join(os.path.dirname(__file__), 'search_counter.json')
+COUNTER_FILE = os.path.join(os.path.dirname(__file__), 'search_counter.json')  # legacy store, imported once
+COUNTER_DB = os.path.join(os.path.dirname(__file__), 'search_counter.sqlite')
+FLUSH_INTERVAL = 5.0  # seconds between background flushes
 CONTEXTUALWEB_QUOTA = 10000
 SERPAPI_QUOTA = 100  # adjust if you want to track this too
 
 
-def _load_counter():
-    if not os.path.exists(COUNTER_FILE):
-        return {"contextualweb": {"count": 0, "last_reset": None}, "serpapi": {"count": 0, "last_reset": None}}
-    with open(COUNTER_FILE, 'r') as f:
-        return json.load(f)
+def _this_month():
+    return datetime.now().strftime('%Y-%m')
 
-def _save_counter(counter):
-    with open(COUNTER_FILE, 'w') as f:
-        json.dump(counter, f)
 
-def _reset_if_needed(api):
-    counter = _load_counter()
-    now = datetime.now()
-    this_month = now.strftime('%Y-%m')
-    last_reset = counter[api].get("last_reset")
-    if last_reset != this_month:
-        counter[api]["count"] = 0
-        counter[api]["last_reset"] = this_month
-        _save_counter(counter)
-    return counter
+class Reservation:
+    """Queries pre-billed for a batch; unused ones are handed back on release()."""
+
+    def __init__(self, counter, api, granted):
+        self._counter = counter
+        self._lock = threading.Lock()
+        self.api = api
+        self.granted = granted
+        self.remaining = granted
+
+    def use(self):
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+    def release(self):
+        with self._lock:
+            unused, self.remaining = self.remaining, 0
+        if unused:
+            self._counter.increment(self.api, -unused)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class UsageCounter:
+    """
+    In-memory API usage counts with atomic increments, flushed to SQLite (WAL) on an
+    interval and at shutdown. Flushes add deltas inside a write transaction, so several
+    processes can share the same counter file. Counts are kept per calendar month.
+    """
+
+    def __init__(self, path=COUNTER_DB, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = defaultdict(int)   # (api, month) -> increments not yet on disk
+        self._persisted = {}               # (api, month) -> count as of the last flush
+        self._init_db()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, args=(flush_interval,), daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS usage ("
+                "api TEXT, month TEXT, count INTEGER, PRIMARY KEY (api, month))"
+            )
+            self._import_legacy(conn)
+            self._refresh(conn)
+        finally:
+            conn.close()
+
+    def _import_legacy(self, conn):
+        if not os.path.exists(COUNTER_FILE):
+            return
+        try:
+            with open(COUNTER_FILE, 'r') as f:
+                legacy = json.load(f)
+        except (OSError, ValueError):
+            return
+        for api, entry in legacy.items():
+            if entry.get("last_reset"):
+                conn.execute(
+                    "INSERT OR IGNORE INTO usage VALUES (?, ?, ?)",
+                    (api, entry["last_reset"], entry.get("count", 0))
+                )
+
+    def _refresh(self, conn):
+        rows = conn.execute("SELECT api, month, count FROM usage WHERE month = ?", (_this_month(),)).fetchall()
+        self._persisted = {(api, month): count for api, month, count in rows}
+
+    def _apply(self, conn, deltas):
+        for (api, month), delta in deltas.items():
+            if delta:
+                conn.execute(
+                    "INSERT INTO usage VALUES (?, ?, ?) "
+                    "ON CONFLICT(api, month) DO UPDATE SET count = count + excluded.count",
+                    (api, month, delta)
+                )
+
+    def increment(self, api, n=1):
+        key = (api, _this_month())
+        with self._lock:
+            self._pending[key] += n
+            return self._persisted.get(key, 0) + self._pending[key]
+
+    def get(self, api):
+        key = (api, _this_month())
+        with self._lock:
+            return self._persisted.get(key, 0) + self._pending[key]
+
+    def flush(self):
+        with self._lock:
+            deltas = {key: delta for key, delta in self._pending.items() if delta}
+            if not deltas:
+                # Nothing to write: don't take the database write lock (reserve() re-reads counts anyway)
+                return
+            try:
+                conn = self._connect()
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    self._apply(conn, deltas)
+                    self._refresh(conn)
+                    conn.execute("COMMIT")
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                print(f"[!] Usage counter flush failed: {e}")
+                return
+            self._pending.clear()
+
+    def reserve(self, api, n, quota=None):
+        """Atomically pre-bill up to n queries, capped at what is left of the quota."""
+        key = (api, _this_month())
+        with self._lock:
+            try:
+                conn = self._connect()
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    deltas = dict(self._pending)
+                    self._apply(conn, deltas)
+                    self._refresh(conn)
+                    used = self._persisted.get(key, 0)
+                    granted = n if quota is None else max(0, min(n, quota - used))
+                    self._apply(conn, {key: granted})
+                    self._refresh(conn)
+                    conn.execute("COMMIT")
+                    self._pending.clear()
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                # Closing without COMMIT rolled the transaction back; bill against this
+                # process's own counts and let the next flush write the reservation
+                print(f"[!] Usage counter reserve failed, using in-memory counts: {e}")
+                used = self._persisted.get(key, 0) + self._pending[key]
+                granted = n if quota is None else max(0, min(n, quota - used))
+                self._pending[key] += granted
+        return Reservation(self, api, granted)
+
+    def _flush_loop(self, interval):
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def _get_counter():
+    global _counter
+    with _counter_lock:
+        if _counter is None:
+            _counter = UsageCounter()
+        return _counter
+
 
 def increment_api_count(api):
-    counter = _reset_if_needed(api)
-    counter[api]["count"] += 1
-    _save_counter(counter)
-    return counter[api]["count"]
+    return _get_counter().increment(api)
+
 
 def get_api_count(api):
-    counter = _reset_if_needed(api)
-    return counter[api]["count"]
+    return _get_counter().get(api)
+
+
+def reserve_api_queries(api, n):
+    return _get_counter().reserve(api, n, quota=get_api_quota(api))
+
+
+def flush_api_counts():
+    _get_counter().flush()
+
 
 def get_api_quota(api):
     if api == "contextualweb":
         return CONTEXTUALWEB_QUOTA
     elif api == "serpapi":
         return SERPAPI_QUOTA
-    return None 
\ No newline at end of file
+    return None
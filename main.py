@@ -1,38 +1,71 @@
 import streamlit as st
 import importlib.util
+import os
 import sys
 import toml
 from rcm_secrets import MAPBOX_TOKEN, SERPAPI_KEY, MAX_RESULTS
+from agent_utils.model_registry import warm_up
 
 
 # --- Dynamic Module Loader ---
 def load_module_as(name, filepath):
+    # Streamlit re-executes this script on every interaction; a page is imported once and
+    # imported again only when its file changes, so edits still show up on the next run
+    mtime = os.path.getmtime(filepath)
+    module = sys.modules.get(name)
+    if module is not None and getattr(module, "__mtime__", None) == mtime:
+        return module
     spec = importlib.util.spec_from_file_location(name, filepath)
     module = importlib.util.module_from_spec(spec)
+    module.__mtime__ = mtime
     sys.modules[name] = module
-    spec.loader.exec_module(module)
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        del sys.modules[name]
+        raise
     return module
 
-# --- Load Pages ---
-email_search_page = load_module_as("email_search_rank", "modules/1_email_search_rank.py")
-prospecting_page = load_module_as("prospecting_map", "modules/2_prospect_search.py")
-ai_outreach_page = load_module_as("ai_outreach", "modules/3_ai_outreach.py")
+# --- Pages: loaded on first render, not at startup ---
+PAGES = {
+    "email_search_rank": "modules/1_email_search_rank.py",
+    "prospecting_map": "modules/2_prospect_search.py",
+    "ai_outreach": "modules/3_ai_outreach.py",
+}
+
+def get_page(name):
+    return load_module_as(name, PAGES[name])
 
 # --- Streamlit App Config ---
 st.set_page_config(page_title="Wealth Research Toolkit", layout="wide")
 
+# --- Optional model warm-up (RCM_WARMUP_MODELS=1), once per server process ---
+@st.cache_resource
+def _warm_up_models():
+    return warm_up()
+
+if os.environ.get("RCM_WARMUP_MODELS") == "1":
+    _warm_up_models()
+
 st.markdown("<h1 style='text-align: center;'>🏛️ RAM Sales Research Toolkit</h1>", unsafe_allow_html=True)
 st.markdown("")
 
-# --- Top-Level Tabs ---
-# Then update your tabs block
-tabs = st.tabs(["📧 Email Search", "📍 Prospecting", "🤖 AI Outreach"])
-
-with tabs[0]:
-    email_search_page.run_email_rank_page()
+# --- Navigation: only the selected page's module is imported and run ---
+# Streamlit drops a widget's state once a run doesn't render it, i.e. after switching pages;
+# writing the value back keeps these settings for when the user returns
+PERSISTED_WIDGETS = ["batch_adaptive"]
+for key in PERSISTED_WIDGETS:
+    if key in st.session_state:
+        st.session_state[key] = st.session_state[key]
 
-with tabs[1]:
-    prospecting_page.run_prospecting_page()
+def _page(name, entry, title, icon):
+    def render():
+        getattr(get_page(name), entry)()
+    return st.Page(render, title=title, icon=icon, url_path=name)
 
-with tabs[2]:
-    ai_outreach_page.run_ai_outreach_page()
+navigation = st.navigation([
+    _page("email_search_rank", "run_email_rank_page", "Email Search", "📧"),
+    _page("prospecting_map", "run_prospecting_page", "Prospecting", "📍"),
+    _page("ai_outreach", "run_ai_outreach_page", "AI Outreach", "🤖"),
+])
+navigation.run()
@@ -2,20 +2,24 @@ import streamlit as st
 import pandas as pd
 import io
 import time
+import uuid
 
-from email_utils.semantic_utils import get_reference_embeddings
+from email_utils.semantic_utils import get_reference_embeddings, get_embedding_cache_stats
 from email_utils.scoring_utils import score_candidates, summarize_hits
-from email_utils.analytics_utils import compute_word_frequencies, render_summary_table
+from email_utils.analytics_utils import compute_word_frequencies, get_all_time_tracker, render_summary_table
+from email_utils.job_queue import get_job_queue
+from email_utils.adaptive_fetch import DEFAULT_CONFIDENCE_THRESHOLD, adaptive_discover, latency_summary
+from upload_utils.upload_loader import remember_upload
 from email_utils.scraper_utils import (
     run_reverse_search,
     fetch_html_from_url,
-    extract_named_snippets,
-    extract_all_emails,
-    match_username_to_name,
+    extract_candidates,
+    normalize_search_results,
+    NameMatcher,
 )
 
-def run_email_discovery(first, last, company, title=None, bulk=False):
-    name = f"{first} {last}"
+def run_email_discovery(first, last, company, title=None, bulk=False, adaptive=False,
+                        confidence_threshold=DEFAULT_CONFIDENCE_THRESHOLD):
     if bulk:
         search_results, status = run_reverse_search(
             first, last, company, title=title, max_results=7, bulk=True
@@ -27,36 +31,51 @@ def run_email_discovery(first, last, company, title=None, bulk=False):
         status = None
 
     # 🔧 Normalize here (fixes the AttributeError)
-    search_results = _normalize_search_results(search_results)
+    search_results = normalize_search_results(search_results)
 
-    all_candidates = []
-    all_context_blocks = []
+    matcher = NameMatcher(first, last)
+    reference_embeddings = get_reference_embeddings()
 
-    for result in search_results:
-        url = result.get("link")        # now safe
-        if not url:
-            continue
+    if adaptive:
+        # Best-first fetching that stops once a candidate clears the threshold
+        all_candidates, all_context_blocks, fetch_stats = adaptive_discover(
+            search_results, first, last, company, fetch_html_from_url,
+            reference_embeddings=reference_embeddings, threshold=confidence_threshold, matcher=matcher
+        )
+    else:
+        all_candidates = []
+        all_context_blocks = []
+        latencies = []
 
-        html = fetch_html_from_url(url)
-        if not html:
-            continue
+        for rank, result in enumerate(search_results):
+            url = result.get("link")        # now safe
+            if not url:
+                continue
 
-        snippets = extract_named_snippets(html, name)
-        all_context_blocks.extend(snippets)
+            start = time.perf_counter()
+            html = fetch_html_from_url(url)
+            latencies.append(time.perf_counter() - start)
+            if not html:
+                continue
 
-        found_emails = extract_all_emails(html)
-        for email in found_emails:
-            username = email.split("@")[0]
-            if match_username_to_name(username, first, last):
-                context = next((s for s in snippets if username in s),
-                               snippets[0] if snippets else "")
-                all_candidates.append((email, context))
+            candidates, snippets = extract_candidates(html, first, last, matcher=matcher)
+            all_context_blocks.extend(snippets)
+            all_candidates.extend((email, context, grade, rank) for email, context, grade in candidates)
+
+        fetch_stats = {"available": len(search_results), "fetched": len(latencies), "saved": 0, "latencies": latencies}
 
-    reference_embeddings = get_reference_embeddings()
     scored = score_candidates(all_candidates, reference_embeddings)
     summary = summarize_hits(scored)
+    summary["pages_fetched"] = f"{fetch_stats['fetched']} / {fetch_stats['available']}"
+    summary["fetches_saved"] = fetch_stats["saved"]
+    for name, value in latency_summary(fetch_stats["latencies"]).items():
+        summary[f"fetch_latency_{name}_s"] = value
     word_freq = compute_word_frequencies(all_context_blocks)
 
+    all_time = get_all_time_tracker()
+    all_time.update_many(all_context_blocks)
+    all_time.save()
+
     return (scored, status) if bulk else (scored, summary, word_freq)
 
 def run_email_rank_page():
@@ -90,6 +109,11 @@ def run_email_rank_page():
             country = st.text_input("Country", placeholder="Optional")
             crd = st.text_input("CRD#", placeholder="Optional")
 
+        adaptive = st.checkbox("⚡ Stop fetching once a confident email is found", value=False)
+        confidence_threshold = st.slider(
+            "Confidence threshold", min_value=0.3, max_value=1.0, value=DEFAULT_CONFIDENCE_THRESHOLD, step=0.05
+        )
+
         submitted = st.form_submit_button("🔍 Search for Emails")
 
     if submitted:
@@ -99,7 +123,8 @@ def run_email_rank_page():
             with st.spinner("Running search, scraping pages, scoring candidates..."):
                 start = time.time()
                 results, summary, word_freq = run_email_discovery(
-                    first_name, last_name, company, title=title
+                    first_name, last_name, company, title=title,
+                    adaptive=adaptive, confidence_threshold=confidence_threshold
                 )
                 st.success(f"Search complete in {round(time.time() - start, 1)} seconds.")
 
@@ -119,6 +144,12 @@ def run_email_rank_page():
             for word, count in word_freq:
                 st.markdown(f"- **{word}** ({count})")
 
+    with st.expander("🔠 Most Common Words Across All Searches"):
+        all_time = get_all_time_tracker()
+        st.caption(f"Approximate counts over {all_time.snippets:,} context snippets.")
+        for word, count in all_time.most_common(20):
+            st.markdown(f"- **{word}** ({count})")
+
     # --- CSV Upload Section ---
     st.markdown("---")
     st.subheader("📁 Batch Upload (CSV)")
@@ -141,95 +172,128 @@ def run_email_rank_page():
     )
 
     # Upload Area
-    uploaded_file = st.file_uploader("Upload CSV with at least: First Name, Last Name, Company", type=["csv"])
+    batch_adaptive = st.checkbox(
+        "⚡ Stop fetching a row's pages once a confident email is found", value=False, key="batch_adaptive",
+        help="Fewer page loads per row. Applies to jobs queued from now on, including re-runs."
+    )
+    # Switching pages empties the uploader; the last upload stays until the file is removed
+    uploaded_file = st.file_uploader(
+        "Upload CSV with at least: First Name, Last Name, Company", type=["csv"], key="email_upload_widget",
+        on_change=lambda: st.session_state.pop("email_upload", None)
+    )
+    upload = remember_upload(st.session_state, "email_upload", uploaded_file)
 
-    if uploaded_file:
-        df = pd.read_csv(uploaded_file)
+    if upload is not None:
+        df, fingerprint, file_name = upload
+        if uploaded_file is None:
+            st.caption(f"Using {file_name} from earlier in this session.")
         required_cols = {"First Name", "Last Name", "Company"}
 
         if not required_cols.issubset(df.columns):
             st.error("CSV must contain at least: First Name, Last Name, Company.")
         else:
-            st.success(f"Found {len(df)} rows. Starting batch search...")
-
-            found_emails = []
-            api_statuses = []
-            for i, row in df.iterrows():
-                st.markdown(f"### 🔎 {i+1}. {row['First Name']} {row['Last Name']} ({row['Company']})")
-                with st.spinner("Scanning..."):
-                    results, status = run_email_discovery(
-                        row["First Name"], row["Last Name"], row["Company"], title=row.get("Title", None), bulk=True
-                    )
-                api_statuses.append(status)
-                if status is not None:
-                    st.info(f"API used: {status['api']} | Searches this month: {status['count']} / {status['quota']}")
-                    if status.get("quota_exceeded"):
-                        st.warning("ContextualWeb API quota exceeded! Falling back to SerpAPI.")
-                    if status.get("fallback"):
-                        st.info("Used SerpAPI as a fallback for this search.")
-                if results:
-                    best_email, _, best_score = results[0]
-                    st.markdown(f"**Top Email:** `{best_email}` — Score: `{best_score:.4f}`")
-                    found_emails.append(best_email)
-                else:
-                    st.warning("No email found.")
-                    found_emails.append("")
-
-            # Add found emails to DataFrame
-            df["Found Email"] = found_emails
-
-            # Download buttons for CSV and Excel
-            st.markdown("### 📤 Download Results")
-            csv_buffer = io.BytesIO()
-            df.to_csv(csv_buffer, index=False)
-            csv_buffer.seek(0)
-            st.download_button(
-                label="📥 Download Results as CSV",
-                data=csv_buffer,
-                file_name="email_search_results.csv",
-                mime="text/csv"
+            # Rows are processed by the background job queue; reruns and refreshes don't interrupt it
+            queue = get_job_queue()
+            job_id = queue.submit(
+                df, name=file_name, fingerprint=fingerprint, owner=job_owner(), adaptive=batch_adaptive
             )
+            if st.button("🔁 Re-run this file", help="Search every row again instead of reusing the earlier job"):
+                job_id = queue.submit(
+                    df, name=file_name, fingerprint=fingerprint, owner=job_owner(), rerun=True,
+                    adaptive=batch_adaptive
+                )
+            if st.session_state.get("email_job_id") != job_id:
+                st.session_state["email_job_id"] = job_id
+                st.success(f"Found {len(df)} rows. Batch search queued.")
+
+    render_batch_job()
+
+
+def job_owner():
+    """Identifies this browser's jobs; kept in the URL so a refresh still lists them."""
+    owner = st.session_state.get("job_owner") or st.query_params.get("owner") or uuid.uuid4().hex[:16]
+    st.session_state["job_owner"] = owner
+    if st.query_params.get("owner") != owner:
+        st.query_params["owner"] = owner
+    return owner
+
+
+def render_batch_job():
+    queue = get_job_queue()
+    jobs = queue.list_jobs(job_owner())
+    if not jobs:
+        return
+
+    # Any of this user's recent jobs can be reopened, e.g. after a browser refresh cleared the upload
+    job_ids = [job["id"] for job in jobs]
+    current = st.session_state.get("email_job_id")
+    selected = st.selectbox(
+        "Batch job",
+        options=job_ids,
+        index=job_ids.index(current) if current in job_ids else 0,
+        format_func=lambda job_id: next(
+            f"{job['name'] or job_id} — {job['status']} ({job['done']}/{job['total']})" for job in jobs if job["id"] == job_id
+        )
+    )
+    st.session_state["email_job_id"] = selected
 
-            excel_buffer = io.BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine="xlsxwriter") as writer:
-                df.to_excel(writer, index=False)
-            excel_buffer.seek(0)
-            st.download_button(
-                label="📥 Download Results as Excel",
-                data=excel_buffer,
-                file_name="email_search_results.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+    # Only the job panel re-renders while the worker is busy, not the whole app
+    active = queue.get_job(selected)["status"] in ("queued", "running")
+    st.fragment(run_every=2 if active else None)(render_job_status)(selected, active)
 
-from collections.abc import Mapping
 
-def _normalize_search_results(obj):
-    """Flatten nested lists/tuples and normalize to dicts with 'link','title','snippet'."""
-    def walk(x):
-        if isinstance(x, (list, tuple)):
-            for y in x:
-                yield from walk(y)
-        else:
-            yield x
-
-    out = []
-    for item in walk(obj or []):
-        if isinstance(item, Mapping):
-            link = item.get("link") or item.get("url") or item.get("href")
-            if link:
-                out.append({
-                    "link": link,
-                    "title": item.get("title") or item.get("name") or "",
-                    "snippet": item.get("snippet") or item.get("description") or "",
-                })
-        elif isinstance(item, str):
-            # If a raw URL string slips through
-            out.append({"link": item, "title": "", "snippet": ""})
-
-    # Dedupe by link
-    seen, dedup = set(), []
-    for d in out:
-        if d["link"] not in seen:
-            seen.add(d["link"])
-            dedup.append(d)
-    return dedup
+def render_job_status(job_id, polling):
+    queue = get_job_queue()
+    job = queue.get_job(job_id)
+
+    if job["status"] == "failed":
+        st.error(f"Batch job failed: {job['error']}")
+    st.progress(
+        job["done"] / job["total"] if job["total"] else 1.0,
+        text=f"Processed {job['done']} / {job['total']} rows ({job['status']})"
+    )
+
+    df = queue.results(job_id)
+    st.dataframe(df, use_container_width=True)
+
+    word_freq = queue.word_frequencies(job_id)
+    if word_freq:
+        with st.expander("🔠 Most Common Words in This Batch"):
+            for word, count in word_freq:
+                st.markdown(f"- **{word}** ({count})")
+
+    if job["stats"]:
+        st.markdown("### ⏱️ Batch Performance")
+        render_summary_table(st, job["stats"])
+        cache_stats = get_embedding_cache_stats()
+        st.caption(
+            f"Embedding cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['entries']} of {cache_stats['max_entries']} entries)"
+        )
+
+    # Download buttons for CSV and Excel
+    st.markdown("### 📤 Download Results")
+    csv_buffer = io.BytesIO()
+    df.to_csv(csv_buffer, index=False)
+    csv_buffer.seek(0)
+    st.download_button(
+        label="📥 Download Results as CSV",
+        data=csv_buffer,
+        file_name="email_search_results.csv",
+        mime="text/csv"
+    )
+
+    excel_buffer = io.BytesIO()
+    with pd.ExcelWriter(excel_buffer, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False)
+    excel_buffer.seek(0)
+    st.download_button(
+        label="📥 Download Results as Excel",
+        data=excel_buffer,
+        file_name="email_search_results.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+    # Job finished while polling: one full rerun stops the timer
+    if polling and job["status"] not in ("queued", "running"):
+        st.rerun()
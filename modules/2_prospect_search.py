@@ -1,11 +1,11 @@
 import streamlit as st
-import pandas as pd
 import io
 import joblib
-import difflib
 
-from prospect_utils.geo_utils import plot_mapbox_scatter
-from prospect_utils.score_utils import rule_based_score
+from upload_utils.upload_loader import remember_upload
+from prospect_utils.geo_utils import render_prospect_map
+from prospect_utils.prospect_dataset import ProspectDataset
+from prospect_utils.score_utils import rule_based_scores
 
 @st.cache_resource
 def load_model():
@@ -14,8 +14,6 @@ def load_model():
     return model, features
 
 # --- Strategy filtering definitions ---
-AUM_ORDER_TARGET = "AUM Order"
-
 FUND_USAGE_COLUMNS = [
     "Dakota Hedge Funds", "Dakota Private Credit", "Dakota Private Equity",
     "Dakota Private Real Estate", "Dakota Real Assets", "Dakota Venture Capital"
@@ -26,27 +24,33 @@ INVEST_TAG_COLUMNS = [
     "Dakota Select Lists", "Dakota OCIO Business", "Dakota Models"
 ]
 
-# --- Utility to fuzzy match a column name ---
-def fuzzy_match(colname, df_cols):
-    match = difflib.get_close_matches(colname, df_cols, n=1, cutoff=0.7)
-    return match[0] if match else None
-
 # --- Main page logic ---
 def run_prospecting_page():
     st.subheader("📍 Prospecting Map & Scoring Tool")
 
-    uploaded_file = st.file_uploader("📁 Upload Prospect Data (.csv)", type=["csv"])
-    if not uploaded_file:
+    # Switching pages empties the uploader; the last upload stays until the file is removed
+    uploaded_file = st.file_uploader(
+        "📁 Upload Prospect Data (.csv)", type=["csv"], key="prospect_upload_widget",
+        on_change=lambda: st.session_state.pop("prospect_upload", None)
+    )
+    upload = remember_upload(st.session_state, "prospect_upload", uploaded_file, encoding='latin1')
+    if upload is None:
         st.stop()
 
-    df = pd.read_csv(uploaded_file, encoding='latin1')
-    st.success(f"✅ Loaded {len(df)} records.")
+    df, fingerprint, file_name = upload
+    st.success(f"✅ Loaded {len(df)} records from {file_name}.")
+
+    # --- Geocoding, column mapping and filter indexes: built once per upload ---
+    dataset = st.session_state.get("prospect_dataset")
+    if dataset is None or dataset.fingerprint != fingerprint:
+        with st.spinner("Geocoding addresses and indexing filters..."):
+            dataset = ProspectDataset(df, fingerprint=fingerprint)
+        st.session_state["prospect_dataset"] = dataset
 
     # --- Required columns ---
-    df_cols = df.columns.tolist()
-    aum_col = fuzzy_match("Dakota AUM", df_cols)
-    state_col = fuzzy_match("Dakota Billing State/Province", df_cols)
-    company_col = fuzzy_match("Dakota Account Name", df_cols) or "Provided Account Name"
+    aum_col = dataset.columns["aum"]
+    state_col = dataset.columns["state"]
+    company_col = dataset.columns["company"] or "Provided Account Name"
 
     if not all([aum_col, state_col, company_col]):
         st.error("❌ Required fields not found: Dakota AUM, Billing State, or Account Name.")
@@ -56,7 +60,7 @@ def run_prospecting_page():
     model_type = st.radio("🧠 Choose scoring model", ["🔧 Rule-based", "🌲 Tree-based Model"])
 
     if model_type == "🔧 Rule-based":
-        df["Score"] = df.apply(rule_based_score, axis=1)
+        df["Score"] = rule_based_scores(df)
     else:
         model, model_features = load_model()
         missing = [f for f in model_features if f not in df.columns]
@@ -75,9 +79,8 @@ def run_prospecting_page():
 
     with st.expander("Filter by:", expanded=True):
         # AUM Order dropdown
-        aum_order_col = fuzzy_match(AUM_ORDER_TARGET, df.columns)
-        if aum_order_col:
-            aum_order_vals = sorted(df[aum_order_col].dropna().unique().tolist())
+        aum_order_vals = dataset.filter_values("aum_order")
+        if aum_order_vals:
             selection = st.selectbox("• AUM Order", options=["None"] + aum_order_vals)
             aum_order_filter = selection if selection != "None" else None
 
@@ -93,21 +96,27 @@ def run_prospecting_page():
             selection = st.selectbox("• Invests In", options=["None"] + available_invests)
             invests_in_filter = selection if selection != "None" else None
 
+        map_zoom = st.slider("• Map detail (zoom)", min_value=2, max_value=10, value=3,
+                             help="Large result sets are grouped into map cells sized for this zoom level.")
+
     # Determine color overlay from selected field
     overlay_field = fund_usage_filter or invests_in_filter or None
 
     # --- Render Map ---
     try:
-        st.plotly_chart(
-            plot_mapbox_scatter(
-                df,
-                color_feature=overlay_field,
-                aum_filter=aum_order_filter,
-                fund_filter=fund_usage_filter,
-                invest_filter=invests_in_filter
-            ),
-            use_container_width=True
-        )
+        if dataset.geo.empty:
+            st.warning("⚠️ Map could not be generated: no valid geocoded data.")
+        else:
+            dataset.set_scores(df["Score"])
+            filtered = dataset.filter(
+                aum_order=aum_order_filter,
+                fund_usage=fund_usage_filter,
+                invests_in=invests_in_filter
+            )
+            st.plotly_chart(
+                render_prospect_map(filtered, color_feature=overlay_field, zoom=map_zoom),
+                use_container_width=True
+            )
     except Exception as e:
         st.warning(f"⚠️ Could not render map: {e}")
 
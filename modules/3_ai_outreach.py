@@ -1,7 +1,19 @@
 import streamlit as st
+import pandas as pd
 import tempfile
+import io
 import os
 from agent_utils.open_source_agent import OpenSourceAgent
+from agent_utils.outreach_jobs import get_outreach_job, start_outreach_job
+from agent_utils.retrieval import ProspectIndex
+
+DEFAULT_OUTREACH_TEMPLATE = (
+    "Write a short, personalized introductory email to {Dakota Account Name} "
+    "in {Dakota Billing State/Province} highlighting how our strategies fit their allocations."
+)
+OUTREACH_SYSTEM_MESSAGE = (
+    "You are an institutional sales strategist crafting targeted outreach messages based on prospect data."
+)
 
 def run_ai_outreach_page():
     st.subheader("🤖 AI Outreach Agent")
@@ -10,11 +22,20 @@ def run_ai_outreach_page():
     if df is None:
         st.info("For full capacity, upload your data into the Prospecting tab. The agent will still respond, but without prospect data context.")
 
-    # --- Setup agent with or without prospect data ---
-    agent = OpenSourceAgent(
-        system_message="You are an institutional sales strategist crafting targeted outreach messages based on prospect data.",
-        data=df
-    )
+    # --- Agent is built on demand: nothing is embedded or loaded until a prompt is submitted ---
+    def build_agent():
+        # Retrieval index over scored prospects: re-embeds only rows that changed
+        retriever = st.session_state.setdefault("prospect_index", ProspectIndex())
+        if df is not None:
+            with st.spinner("Indexing prospects for retrieval..."):
+                retriever.update(df)
+
+        # Setup agent with or without prospect data
+        return OpenSourceAgent(
+            system_message=OUTREACH_SYSTEM_MESSAGE,
+            data=df,
+            retriever=retriever if df is not None else None
+        )
 
     # --- UI Chat Input ---
     user_input = st.chat_input("Ask the agent to craft a message...")
@@ -25,7 +46,86 @@ def run_ai_outreach_page():
 
         with st.chat_message("assistant"):
             try:
-                response = agent.generate_response(user_input)
+                agent = build_agent()
+                st.write_stream(agent.stream_response(user_input, reuse_prefix_cache=True))
+                stats = agent.last_stats
+                st.caption(
+                    f"{stats['tokens']} tokens · first token {stats['time_to_first_token']}s · "
+                    f"{stats['tokens_per_sec']} tokens/sec"
+                )
             except Exception as e:
-                response = f"Error: {e}"
-            st.markdown(response)
+                st.markdown(f"Error: {e}")
+
+    # --- Batch outreach over the top-scored prospects ---
+    if df is not None:
+        render_batch_outreach(df)
+
+
+def render_batch_outreach(df):
+    st.markdown("### 📬 Batch Outreach Drafts")
+    with st.expander("Generate drafts for top prospects", expanded=False):
+        if df.empty:
+            # number_input cannot have max_value 0 below min_value 1
+            st.info("No prospects to draft for. Upload a file with at least one row on the Prospecting page.")
+        else:
+            render_outreach_form(df)
+
+    job = get_outreach_job(st.session_state.get("outreach_job_id"))
+    if job is None:
+        return
+
+    # Only the drafts panel re-renders while the background job is drafting, not the whole page
+    st.fragment(run_every=2 if job.running else None)(render_outreach_status)(job.job_id, job.running)
+
+
+def render_outreach_form(df):
+    template = st.text_area(
+        "Prompt template (use {Column Name} to insert prospect fields)",
+        value=DEFAULT_OUTREACH_TEMPLATE
+    )
+    top_n = st.number_input("Top N prospects by score", min_value=1, max_value=len(df), value=min(20, len(df)))
+    batch_size = st.slider("Batch size", min_value=1, max_value=32, value=8)
+
+    rows = df.sort_values("Score", ascending=False).head(int(top_n)) if "Score" in df.columns else df.head(int(top_n))
+    if st.button("🚀 Generate Drafts"):
+        # Each row is its own source, so the batch only needs the model, not the retrieval index
+        agent = OpenSourceAgent(system_message=OUTREACH_SYSTEM_MESSAGE)
+        job = start_outreach_job(agent, template, rows, batch_size=batch_size)
+        st.session_state["outreach_job_id"] = job.job_id
+
+
+def render_outreach_status(job_id, polling):
+    job = get_outreach_job(job_id)
+
+    if job.error:
+        st.error(f"Batch generation failed: {job.error}")
+    st.progress(job.progress, text=f"Drafted {job.completed} / {len(job.rows)} messages")
+
+    results = job.results()
+    st.dataframe(results, use_container_width=True)
+
+    # Download buttons for CSV and Excel
+    csv_buffer = io.BytesIO()
+    results.to_csv(csv_buffer, index=False)
+    csv_buffer.seek(0)
+    st.download_button(
+        label="📥 Download Drafts as CSV",
+        data=csv_buffer,
+        file_name="outreach_drafts.csv",
+        mime="text/csv"
+    )
+
+    excel_buffer = io.BytesIO()
+    with pd.ExcelWriter(excel_buffer, engine="xlsxwriter") as writer:
+        results.to_excel(writer, index=False)
+    excel_buffer.seek(0)
+    st.download_button(
+        label="📥 Download Drafts as Excel",
+        data=excel_buffer,
+        file_name="outreach_drafts.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+    # Job finished while polling: one full rerun stops the timer
+    if polling and not job.running:
+        st.rerun()
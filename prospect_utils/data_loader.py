@@ -1,14 +1,109 @@
+import os
+import re
+import json
+import hashlib
+import threading
+import unicodedata
 import pandas as pd
 import difflib
 
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "upload_cache")
+COLUMN_MAP_FILE = os.path.join(CACHE_DIR, "column_mappings.json")
+
+_column_maps = None
+_cache_lock = threading.Lock()
+
+
+# --- Column resolution ---
+def _load_column_maps():
+    global _column_maps
+    if _column_maps is None:
+        try:
+            with open(COLUMN_MAP_FILE, "r") as f:
+                _column_maps = json.load(f)
+        except (OSError, ValueError):
+            _column_maps = {}
+    return _column_maps
+
+
+def resolve_columns(columns, targets, cutoff=0.7):
+    """
+    Fuzzy-match each target name to a column (None when missing). Results depend only
+    on the header, so they are cached on disk keyed by a hash of header + targets.
+    """
+    columns = [str(c) for c in columns]
+    targets = list(targets)
+    key = hashlib.sha1(json.dumps([columns, targets, cutoff]).encode("utf-8")).hexdigest()
+
+    with _cache_lock:
+        column_maps = _load_column_maps()
+        if key in column_maps:
+            return dict(column_maps[key])
+
+    mapping = {}
+    for target in targets:
+        match = difflib.get_close_matches(target, columns, n=1, cutoff=cutoff)
+        mapping[target] = match[0] if match else None
+
+    with _cache_lock:
+        column_maps[key] = mapping
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(COLUMN_MAP_FILE, "w") as f:
+                json.dump(column_maps, f)
+        except OSError as e:
+            print(f"[!] Could not persist column mapping: {e}")
+    return dict(mapping)
+
+
+
+# --- Address cleaning ---
+_QUOTES = str.maketrans({"’": "'", "‘": "'", "“": '"', "”": '"'})
+
+# USPS-style abbreviations used for the canonical geocoding key
+ADDRESS_ABBREVIATIONS = {
+    "STREET": "ST", "AVENUE": "AVE", "BOULEVARD": "BLVD", "ROAD": "RD", "DRIVE": "DR",
+    "LANE": "LN", "COURT": "CT", "PLACE": "PL", "SQUARE": "SQ", "PARKWAY": "PKWY",
+    "HIGHWAY": "HWY", "CIRCLE": "CIR", "TERRACE": "TER", "PLAZA": "PLZ", "CENTER": "CTR",
+    "SUITE": "STE", "FLOOR": "FL", "BUILDING": "BLDG", "APARTMENT": "APT",
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W",
+}
+_ABBREVIATION_REGEX = re.compile(r"\b(" + "|".join(ADDRESS_ABBREVIATIONS) + r")\b")
+# ZIP at the end of an address, as ZIP+4 or with the float/leading-zero damage of numeric columns
+_TRAILING_ZIP_REGEX = re.compile(r"(?<=\s)(\d{3,5})(?:-?\d{4})?(?:\.0)?$")
+
 
 def clean_address_field(val):
     if pd.isna(val):
         return ""
-    val = str(val).encode("ascii", "ignore").decode("utf-8")
-    val = val.replace("\n", " ").replace("\r", " ")
-    val = val.replace("’", "'").replace("“", '"').replace("”", '"')
-    return val.strip()
+    val = str(val).translate(_QUOTES)
+    val = unicodedata.normalize("NFKD", val).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"\s+", " ", val).strip()
+
+
+def clean_address_series(series):
+    """Vectorized clean_address_field: quote normalization, ASCII folding, whitespace collapse."""
+    values = series.astype(object).fillna("").astype(str)
+    values = values.str.translate(_QUOTES)
+    values = values.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+    return values.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def _canonical_part(series):
+    values = series.str.upper().str.replace(r"[^\w\s#]", " ", regex=True)
+    values = values.str.replace(_ABBREVIATION_REGEX, lambda m: ADDRESS_ABBREVIATIONS[m.group(1)], regex=True)
+    return values.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def canonical_address_keys(addresses):
+    """
+    Geocode cache key for full "street, city, ST zip" strings: uppercase, abbreviated,
+    punctuation-free, with a trailing ZIP cut to 5 digits and its leading zeros restored.
+    Bulk and single-address lookups both use it, so equivalent addresses geocode once.
+    """
+    values = clean_address_series(pd.Series(addresses, dtype=object))
+    values = values.str.replace(_TRAILING_ZIP_REGEX, lambda m: m.group(1).zfill(5), regex=True)
+    return _canonical_part(values)
 
 
 def prepare_address_dataframe(df):
@@ -30,13 +125,10 @@ def prepare_address_dataframe(df):
         "Dakota Billing Zip/Postal Code": None
     }
 
-    for key in required_fields:
-        match = difflib.get_close_matches(key, df.columns, n=1, cutoff=0.8)
-        if match:
-            required_fields[key] = match[0]
-        else:
-            # Return empty DataFrame if required column is missing
-            return pd.DataFrame()
+    required_fields.update(resolve_columns(df.columns, required_fields, cutoff=0.8))
+    if not all(required_fields.values()):
+        # Return empty DataFrame if required column is missing
+        return pd.DataFrame()
 
     street_col = required_fields["Dakota Billing Street"]
     city_col = required_fields["Dakota Billing City"]
@@ -45,15 +137,15 @@ def prepare_address_dataframe(df):
 
     country_col = next((c for c in df.columns if "Country" in c), None)
     if country_col:
-        df = df[df[country_col].fillna("").str.upper() == "UNITED STATES"].copy()
+        df = df[df[country_col].astype(object).fillna("").str.upper() == "UNITED STATES"].copy()
 
     df = df.dropna(subset=[street_col, city_col, state_col, zip_col])
+    # Categorical upload columns: work on plain values from here on
+    df[[street_col, city_col, state_col, zip_col]] = df[[street_col, city_col, state_col, zip_col]].astype(object)
     for col in [street_col, city_col, state_col, zip_col]:
-        df[col] = df[col].apply(clean_address_field)
+        df[col] = clean_address_series(df[col])
 
-    df = df[
-        df[[street_col, city_col, state_col, zip_col]].apply(lambda row: all(str(x).strip() for x in row), axis=1)
-    ].copy()
+    df = df[(df[[street_col, city_col, state_col, zip_col]] != "").all(axis=1)].copy()
 
     try:
         df["Full_Address"] = (
@@ -65,5 +157,6 @@ def prepare_address_dataframe(df):
     except Exception:
         return pd.DataFrame()
 
-    df = df[df["Full_Address"].str.len() > 10]
+    df = df[df["Full_Address"].str.len() > 10].copy()
+    df["Address_Key"] = canonical_address_keys(df["Full_Address"])
     return df 
\ No newline at end of file
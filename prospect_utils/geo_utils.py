@@ -2,23 +2,18 @@ import pandas as pd
 import plotly.express as px
 import streamlit as st
 from rcm_secrets import MAPBOX_TOKEN
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
 import difflib
 from prospect_utils.data_loader import clean_address_field, prepare_address_dataframe
+from prospect_utils.geocode_cache import geocode_addresses
+from prospect_utils.spatial_utils import geohash_codes, aggregate_cells, zoom_to_precision
+
+MARKER_THRESHOLD = 2000  # above this many points the map shows aggregated cells
 
 # Set Mapbox token
 px.set_mapbox_access_token(MAPBOX_TOKEN)
 
-@st.cache_data(show_spinner=False)
 def geocode_address(address):
-    geolocator = Nominatim(user_agent="rcm_mapbox")
-    geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1)
-    try:
-        loc = geocode(address)
-        return (loc.latitude, loc.longitude) if loc else (None, None)
-    except:
-        return (None, None)
+    return geocode_addresses([address])[0]
 
 @st.cache_data(show_spinner=True)
 def enrich_with_coordinates(df):
@@ -27,13 +22,41 @@ def enrich_with_coordinates(df):
         st.warning("⚠️ Address preparation failed or missing required columns.")
         return pd.DataFrame()
 
-    coords = df["Full_Address"].apply(geocode_address)
-    df["Latitude"] = coords.apply(lambda x: x[0])
-    df["Longitude"] = coords.apply(lambda x: x[1])
+    coords = geocode_addresses(df["Full_Address"].tolist(), keys=df["Address_Key"].tolist())
+    df["Latitude"] = [lat for lat, _ in coords]
+    df["Longitude"] = [lon for _, lon in coords]
     df = df.dropna(subset=["Latitude", "Longitude"])
+    # Precompute each point's cell once; filters and zoom changes only shift/group these codes
+    df["Geo_Cell"] = geohash_codes(df["Latitude"], df["Longitude"])
     return df
 
-def plot_mapbox_scatter(df, color_feature=None, state_filter=None, aum_filter=None, fund_filter=None, invest_filter=None):
+def plot_aggregated_cells(df, zoom=3, aum_col=None):
+    precision = zoom_to_precision(zoom)
+    cells = aggregate_cells(df, precision, aum_col=aum_col)
+    hover_data = {col: True for col in ["Count", "AUM Sum", "Mean Score"] if col in cells.columns}
+
+    fig = px.scatter_mapbox(
+        cells,
+        lat="Latitude",
+        lon="Longitude",
+        size="Count",
+        size_max=30,
+        color="Mean Score" if "Mean Score" in cells.columns else None,
+        color_continuous_scale="Viridis",
+        hover_name="Cell",
+        hover_data=hover_data,
+        zoom=zoom,
+        center={"lat": 37.0902, "lon": -95.7129},  # USA center
+        title=f"U.S. Prospects by Area ({len(df):,} prospects in {len(cells):,} cells)"
+    )
+    fig.update_layout(
+        mapbox_style="outdoors",
+        margin=dict(l=0, r=0, t=30, b=0)
+    )
+    return fig
+
+def plot_mapbox_scatter(df, color_feature=None, state_filter=None, aum_filter=None, fund_filter=None, invest_filter=None,
+                        zoom=3, marker_threshold=MARKER_THRESHOLD):
     df = enrich_with_coordinates(df)
     if df.empty:
         st.warning("⚠️ Map could not be generated: no valid geocoded data.")
@@ -64,6 +87,10 @@ def plot_mapbox_scatter(df, color_feature=None, state_filter=None, aum_filter=No
         if invest_col in df.columns:
             df = df[df[invest_col] == invest_filter]
 
+    return render_prospect_map(df, color_feature=color_feature, zoom=zoom, marker_threshold=marker_threshold)
+
+def render_prospect_map(df, color_feature=None, zoom=3, marker_threshold=MARKER_THRESHOLD):
+    """Draw an already geocoded and filtered frame (see ProspectDataset)."""
     if df.empty:
         st.warning("⚠️ No matching prospects after filters.")
         return None
@@ -72,6 +99,10 @@ def plot_mapbox_scatter(df, color_feature=None, state_filter=None, aum_filter=No
     aum_col = next((c for c in df.columns if "Dakota AUM" in c), None)
     name_col = next((c for c in df.columns if "Account Name" in c and "Dakota" in c), "Provided Account Name")
 
+    # --- Aggregate dense maps server-side instead of sending every marker ---
+    if len(df) > marker_threshold:
+        return plot_aggregated_cells(df, zoom=zoom, aum_col=aum_col)
+
     # --- Color Overlay ---
     color_type = "categorical"
     color_map = None
@@ -80,7 +111,7 @@ def plot_mapbox_scatter(df, color_feature=None, state_filter=None, aum_filter=No
         col_values = df[color_feature].dropna().unique()
         if df[color_feature].dropna().isin(["Yes", "No", 1, 0]).all():
             color_type = "yesno"
-            df[color_feature] = df[color_feature].replace({"Yes": 1, "No": 0})
+            df[color_feature] = df[color_feature].astype(object).replace({"Yes": 1, "No": 0})
             color_map = {0: "red", 1: "green"}
         elif df[color_feature].nunique() <= 4 and set(col_values).issubset({"Zero", "Small", "Medium", "Large"}):
             color_type = "ordinal"
@@ -115,7 +146,7 @@ def plot_mapbox_scatter(df, color_feature=None, state_filter=None, aum_filter=No
         size_max=18,
         hover_name=name_col,
         hover_data=["Full_Address", aum_col, color_feature] if color_feature in df.columns else ["Full_Address", aum_col],
-        zoom=3,
+        zoom=zoom,
         center={"lat": 37.0902, "lon": -95.7129},  # USA center
         title=f"U.S. Prospects by {color_feature or 'Location'}"
     )
@@ -0,0 +1,193 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+import pandas as pd
+
+from prospect_utils.data_loader import canonical_address_keys
+
+CACHE_PATH = os.path.join(os.path.dirname(__file__), "geocode_cache.sqlite")
+# Optional local table with columns: zip, lat, lon (e.g. a Census ZCTA gazetteer export);
+# without it the GeoNames US postal codes from pgeocode are used
+ZIP_CENTROIDS_PATH = os.path.join(os.path.dirname(__file__), "data", "zip_centroids.csv")
+NEGATIVE_TTL = 30 * 24 * 3600  # retry addresses that were not found after 30 days
+
+# Trailing ZIP, ZIP+4 (with or without the dash), or a 4-digit ZIP after a state code
+# whose leading zero was lost to a numeric column ("Boston, MA 2116")
+_ZIP_REGEX = re.compile(r"(?:\b(\d{5})|(?<=\b[A-Za-z]{2} )(\d{4}))(?:-?\d{4})?(?:\.0)?\s*$")
+
+
+# --- Backends ---
+# geocode(address) returns (lat, lon) when found, (None, None) when the backend is sure
+# there is no match, and None when it cannot answer (missing data, network error).
+
+class ZipCentroidBackend:
+    name = "zip_centroid"
+    offline = True
+
+    def __init__(self, path=ZIP_CENTROIDS_PATH):
+        self.centroids = {}
+        self._postal_codes = None
+        if os.path.exists(path):
+            table = pd.read_csv(path, dtype={"zip": str})
+            self.centroids = {
+                str(z).zfill(5): (float(lat), float(lon))
+                for z, lat, lon in zip(table["zip"], table["lat"], table["lon"])
+            }
+        else:
+            try:
+                import pgeocode
+                # Downloads the GeoNames US table on first use, then reads it from pgeocode's cache
+                self._postal_codes = pgeocode.Nominatim("us")
+            except Exception as e:
+                print(f"[!] ZIP centroids unavailable, geocoding online only: {e}")
+
+    @property
+    def available(self):
+        return bool(self.centroids) or self._postal_codes is not None
+
+    def geocode(self, address):
+        match = _ZIP_REGEX.search(str(address))
+        if not match:
+            return None
+        zip_code = (match.group(1) or match.group(2)).zfill(5)
+        if zip_code not in self.centroids and self._postal_codes is not None:
+            row = self._postal_codes.query_postal_code(zip_code)
+            self.centroids[zip_code] = None if pd.isna(row.latitude) else (float(row.latitude), float(row.longitude))
+        return self.centroids.get(zip_code)
+
+
+class NominatimBackend:
+    name = "nominatim"
+    offline = False
+
+    def __init__(self, user_agent="rcm_mapbox", min_delay_seconds=1):
+        self.user_agent = user_agent
+        self.min_delay_seconds = min_delay_seconds
+        self._geocode = None
+        self._lock = threading.Lock()
+        self.available = True
+
+    def _geocoder(self):
+        # Build the client and rate limiter once, not per address
+        with self._lock:
+            if self._geocode is None:
+                from geopy.geocoders import Nominatim
+                from geopy.extra.rate_limiter import RateLimiter
+                geolocator = Nominatim(user_agent=self.user_agent)
+                self._geocode = RateLimiter(
+                    geolocator.geocode, min_delay_seconds=self.min_delay_seconds,
+                    max_retries=2, swallow_exceptions=False
+                )
+            return self._geocode
+
+    def geocode(self, address):
+        try:
+            loc = self._geocoder()(address)
+        except Exception as e:
+            print(f"[!] Geocoding failed for {address}: {e}")
+            return None
+        return (loc.latitude, loc.longitude) if loc else (None, None)
+
+
+def default_backends(offline_only=False):
+    """ZIP centroids first (instant, when a table is available), then Nominatim for the rest."""
+    backends = []
+    zip_backend = ZipCentroidBackend()
+    if zip_backend.available:
+        backends.append(zip_backend)
+    if not offline_only:
+        backends.append(NominatimBackend())
+    return backends
+
+
+# --- Persistent store ---
+class GeocodeCache:
+    """SQLite-backed canonical address key -> (lat, lon) store; every result is committed as it lands."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocodes ("
+            "key TEXT PRIMARY KEY, address TEXT, lat REAL, lon REAL, source TEXT, updated REAL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, lat, lon, updated FROM geocodes WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update({key: (lat, lon, updated) for key, lat, lon, updated in rows})
+        return found
+
+    def put(self, key, address, coords, source):
+        lat, lon = coords
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?, ?)",
+                (key, address, lat, lon, source, time.time())
+            )
+            self._conn.commit()
+
+
+_cache = None
+_backends = None
+
+
+def get_geocode_cache():
+    global _cache
+    if _cache is None:
+        _cache = GeocodeCache()
+    return _cache
+
+
+def geocode_addresses(addresses, keys=None, backends=None, cache=None, progress_callback=None):
+    """
+    Geocode a list of addresses, returning (lat, lon) tuples aligned with the input.
+    Identical addresses (by canonical_address_keys, or the provided `keys`) are looked up once,
+    cached results are reused, and only misses hit the backends.
+    """
+    global _backends
+    if backends is None:
+        if _backends is None:
+            _backends = default_backends()
+        backends = _backends
+    cache = cache or get_geocode_cache()
+
+    addresses = list(addresses)
+    keys = list(keys) if keys is not None else canonical_address_keys(addresses).tolist()
+    unique = {}
+    for key, address in zip(keys, addresses):
+        if key and key not in unique:
+            unique[key] = address
+
+    resolved = {}
+    now = time.time()
+    for key, (lat, lon, updated) in cache.get_many(unique).items():
+        if lat is not None or now - updated < NEGATIVE_TTL:
+            resolved[key] = (lat, lon)
+
+    misses = [key for key in unique if key not in resolved]
+    for done, key in enumerate(misses, start=1):
+        address = unique[key]
+        for backend in backends:
+            coords = backend.geocode(address)
+            if coords is None:
+                continue  # backend cannot answer; try the next one
+            resolved[key] = coords
+            if not backend.offline:
+                cache.put(key, address, coords, backend.name)
+            if coords[0] is not None:
+                break
+        if progress_callback:
+            progress_callback(done, len(misses))
+
+    return [resolved.get(key, (None, None)) for key in keys]
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from prospect_utils.data_loader import resolve_columns
+from prospect_utils.geo_utils import enrich_with_coordinates
+
+# Columns resolved against the raw upload
+COLUMN_TARGETS = {
+    "aum": "Dakota AUM",
+    "state": "Dakota Billing State/Province",
+    "company": "Dakota Account Name",
+    "aum_order": "AUM Order",
+}
+
+# Map filters, resolved against the geocoded frame
+FILTER_TARGETS = {
+    "state": "Dakota Billing State/Province",
+    "aum_order": "AUM Order",
+    "fund_usage": "Fund Usage",
+    "invests_in": "Invests In",
+}
+
+
+def _inverted_index(values):
+    """value -> sorted row positions, built from categorical codes with one stable sort."""
+    categorical = pd.Categorical(values)
+    codes = categorical.codes
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(categorical.categories) + 1))
+    return categorical, {
+        value: order[bounds[i]:bounds[i + 1]]
+        for i, value in enumerate(categorical.categories)
+    }
+
+
+class ProspectDataset:
+    """
+    Everything the map needs that only depends on the upload: the geocoded frame,
+    resolved column mapping, categorical codes and a per-value row index for each
+    filter. Built once per upload; filter changes become index intersections.
+    """
+
+    def __init__(self, df, fingerprint=None):
+        self.fingerprint = fingerprint
+        resolved = resolve_columns(df.columns, COLUMN_TARGETS.values())
+        self.columns = {key: resolved[target] for key, target in COLUMN_TARGETS.items()}
+        self.geo = enrich_with_coordinates(df)
+
+        resolved = resolve_columns(self.geo.columns, FILTER_TARGETS.values()) if not self.geo.empty else {}
+        self.filter_columns = {key: resolved.get(target) for key, target in FILTER_TARGETS.items()}
+        self.categoricals = {}
+        self.indexes = {}
+        for key, col in self.filter_columns.items():
+            if col:
+                self.categoricals[key], self.indexes[key] = _inverted_index(self.geo[col])
+
+    def filter_values(self, key):
+        return sorted(self.indexes.get(key, {}).keys())
+
+    def set_scores(self, scores):
+        """Attach the current Score column (by original row index) without rebuilding anything."""
+        if not self.geo.empty:
+            self.geo["Score"] = scores.reindex(self.geo.index)
+
+    def filter(self, **selections):
+        """Rows matching every non-empty selection, e.g. filter(state="MO", aum_order="Large")."""
+        positions = None
+        for key, value in selections.items():
+            if value is None or key not in self.indexes:
+                continue
+            matches = self.indexes[key].get(value, np.array([], dtype=np.intp))
+            positions = matches if positions is None else np.intersect1d(positions, matches, assume_unique=True)
+        if positions is None:
+            return self.geo.copy()
+        return self.geo.iloc[positions].copy()
@@ -1,31 +1,101 @@
 import numpy as np
+import pandas as pd
+
+# Weights and keyword lists for rule-based scoring; override per call via `config`
+DEFAULT_SCORE_CONFIG = {
+    "aum_column": "AUM",
+    "aum_min": 10,       # assume AUM in millions
+    "aum_max": 1000,
+    "aum_weight": 0.6,
+    "strategy_column": "Strategy",
+    # First matching tier wins
+    "strategy_tiers": [
+        (["alts", "hedge"], 0.2),
+        (["etf", "index"], 0.1),
+    ],
+    "metro_column": "Metro",
+    "metros": ["new york", "los angeles", "chicago", "houston", "miami"],
+    "metro_weight": 0.1,
+    "max_score": 1.0,
+}
+
+def _resolve_config(config):
+    return {**DEFAULT_SCORE_CONFIG, **(config or {})}
 
 def normalize(val, min_val, max_val):
     """Min-max normalization with clipping for safety."""
     return (val - min_val) / (max_val - min_val) if max_val > min_val else 0.0
 
-def rule_based_score(row):
+def rule_based_score(row, config=None):
     """
     Rule-based scoring logic for prospect evaluation.
     You can extend this with weights and feature logic as needed.
     """
+    cfg = _resolve_config(config)
     score = 0.0
 
     # AUM weighting
-    aum = row.get("AUM", 0)
-    score += normalize(aum, 10, 1000) * 0.6  # assume AUM in millions
+    aum = row.get(cfg["aum_column"], 0)
+    score += normalize(aum, cfg["aum_min"], cfg["aum_max"]) * cfg["aum_weight"]
 
     # Strategy preference
-    strat = str(row.get("Strategy", "")).lower()
-    if "alts" in strat or "hedge" in strat:
-        score += 0.2
-    elif "etf" in strat or "index" in strat:
-        score += 0.1
+    strat = str(row.get(cfg["strategy_column"], "")).lower()
+    for keywords, weight in cfg["strategy_tiers"]:
+        if any(keyword in strat for keyword in keywords):
+            score += weight
+            break
 
     # Metro bonus if available
-    metro = str(row.get("Metro", "")).lower()
-    if metro in ["new york", "los angeles", "chicago", "houston", "miami"]:
-        score += 0.1
+    metro = str(row.get(cfg["metro_column"], "")).lower()
+    if metro in cfg["metros"]:
+        score += cfg["metro_weight"]
 
     # Clip final score
-    return round(min(score, 1.0), 4)
+    return round(min(score, cfg["max_score"]), 4)
+
+def rule_based_scores(df, config=None):
+    """
+    Columnar equivalent of `df.apply(rule_based_score, axis=1)`: same terms and
+    weights computed with vector ops. Returns a float Series aligned with df.
+    """
+    cfg = _resolve_config(config)
+    score = np.zeros(len(df))
+
+    # AUM weighting
+    if cfg["aum_column"] in df.columns:
+        aum = pd.to_numeric(df[cfg["aum_column"]], errors="coerce").to_numpy(dtype=float)
+    else:
+        aum = np.zeros(len(df))
+    score += normalize(aum, cfg["aum_min"], cfg["aum_max"]) * cfg["aum_weight"]
+
+    # Strategy preference
+    if cfg["strategy_column"] in df.columns and cfg["strategy_tiers"]:
+        strat = df[cfg["strategy_column"]].astype(str).str.lower()
+        conditions = [
+            np.logical_or.reduce([strat.str.contains(k, regex=False, na=False).to_numpy() for k in keywords])
+            for keywords, _ in cfg["strategy_tiers"]
+        ]
+        score += np.select(conditions, [weight for _, weight in cfg["strategy_tiers"]], default=0.0)
+
+    # Metro bonus if available
+    if cfg["metro_column"] in df.columns:
+        metro = df[cfg["metro_column"]].astype(str).str.lower()
+        score += np.where(metro.isin(cfg["metros"]).to_numpy(), cfg["metro_weight"], 0.0)
+
+    # Clip final score. On ties like 0.76435 np.round and round() differ: df.apply passes
+    # NumPy scalars (np.round) only when every column is numeric, Python floats otherwise
+    clipped = np.minimum(score, cfg["max_score"])
+    if cfg["aum_column"] in df.columns and _numeric_rows(df):
+        rounded = np.round(clipped, 4)
+    else:
+        rounded = [round(value, 4) for value in clipped.tolist()]
+    return pd.Series(rounded, index=df.index, name="Score", dtype=float)
+
+def _numeric_rows(df):
+    """Whether df.apply(axis=1) hands out rows of a NumPy numeric dtype rather than object."""
+    dtypes = list(df.dtypes)
+    return bool(dtypes) and all(
+        pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        and not isinstance(dtype, pd.api.extensions.ExtensionDtype)
+        for dtype in dtypes
+    )
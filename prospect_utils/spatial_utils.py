@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+GEOHASH_PRECISION = 12           # characters stored per point
+_COORD_BITS = GEOHASH_PRECISION * 5 // 2
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_codes(lat, lon):
+    """
+    Vectorized full-precision geohash as int64 (lon/lat bits interleaved, lon first).
+    The cell at any coarser precision is a right shift, so this is computed once per point.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    scale = 2 ** _COORD_BITS
+    lat_q = np.clip(np.floor((lat + 90.0) / 180.0 * scale), 0, scale - 1).astype(np.int64)
+    lon_q = np.clip(np.floor((lon + 180.0) / 360.0 * scale), 0, scale - 1).astype(np.int64)
+
+    codes = np.zeros(lat.shape, dtype=np.int64)
+    for shift in range(_COORD_BITS - 1, -1, -1):
+        codes = (codes << 2) | (((lon_q >> shift) & 1) << 1) | ((lat_q >> shift) & 1)
+    return codes
+
+
+def cell_ids(codes, precision):
+    return np.asarray(codes, dtype=np.int64) >> (5 * (GEOHASH_PRECISION - precision))
+
+
+def cell_to_geohash(cell, precision):
+    chars = []
+    for _ in range(precision):
+        chars.append(_BASE32[int(cell) & 31])
+        cell = int(cell) >> 5
+    return "".join(reversed(chars))
+
+
+def zoom_to_precision(zoom):
+    """Roughly a few dozen cells across the viewport at any Mapbox zoom level."""
+    return int(max(1, min(GEOHASH_PRECISION, (zoom + 3) // 2)))
+
+
+def aggregate_cells(df, precision, code_col="Geo_Cell", aum_col=None, score_col="Score"):
+    """Count, summed AUM and mean score per geohash cell, positioned at the members' centroid."""
+    work = pd.DataFrame({
+        "_cell": cell_ids(df[code_col].to_numpy(), precision),
+        "Latitude": df["Latitude"].to_numpy(dtype=float),
+        "Longitude": df["Longitude"].to_numpy(dtype=float),
+    })
+    columns = {
+        "Latitude": ("Latitude", "mean"),
+        "Longitude": ("Longitude", "mean"),
+        "Count": ("Latitude", "size"),
+    }
+    if aum_col and aum_col in df.columns:
+        work["_aum"] = pd.to_numeric(df[aum_col], errors="coerce").to_numpy()
+        columns["AUM Sum"] = ("_aum", "sum")
+    if score_col in df.columns:
+        work["_score"] = pd.to_numeric(df[score_col], errors="coerce").to_numpy()
+        columns["Mean Score"] = ("_score", "mean")
+
+    agg = work.groupby("_cell").agg(**columns)
+    agg["Cell"] = [cell_to_geohash(cell, precision) for cell in agg.index]
+    return agg.reset_index(drop=True)
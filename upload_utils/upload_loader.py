@@ -0,0 +1,147 @@
+import os
+import io
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "upload_cache")
+MEMORY_CACHE_SIZE = 4
+CATEGORY_MAX_UNIQUE = 1000   # object columns at or under this many values...
+CATEGORY_MAX_RATIO = 0.5     # ...and under this share of rows become categoricals
+
+# Identifier-like columns that must stay text (leading zeros, no float coercion)
+TEXT_COLUMNS = [
+    "Dakota Billing Zip/Postal Code", "Zip", "CRD#", "Phone Number"
+]
+
+# pandas.read_csv's default na_values, so both engines blank out the same cells
+NULL_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+_memory_cache = {}
+_cache_lock = threading.Lock()
+
+
+def fingerprint_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _read_arrow(data, encoding, text_cols):
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    def read(string_cols):
+        return pa_csv.read_csv(
+            io.BytesIO(data),
+            read_options=pa_csv.ReadOptions(encoding=encoding),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={col: pa.string() for col in string_cols},
+                null_values=NULL_VALUES,
+                strings_can_be_null=True,
+            ),
+        )
+
+    table = read(text_cols)
+    # pandas leaves dates as text; so must we
+    temporal = [field.name for field in table.schema if pa.types.is_temporal(field.type)]
+    if temporal:
+        table = read(text_cols + temporal)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_null(field.type):
+            # All-blank column: pandas reads float NaN, arrow an untyped column of None
+            table = table.set_column(i, field.name, pa.nulls(len(table), pa.float64()))
+
+    df = table.to_pandas()
+    for col in df.columns[df.dtypes == object]:
+        # Missing text / booleans come back as None; pandas uses NaN
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def _parse_csv(data, encoding, engine="pyarrow"):
+    header = pd.read_csv(io.BytesIO(data), nrows=0, encoding=encoding).columns
+    text_cols = [col for col in TEXT_COLUMNS if col in header]
+    if engine == "pyarrow":
+        try:
+            return _read_arrow(data, encoding, text_cols)
+        except Exception as e:
+            # pyarrow missing or stricter than the C parser on this file
+            print(f"[!] pyarrow CSV parse failed, using default engine: {e}")
+    return pd.read_csv(io.BytesIO(data), encoding=encoding, dtype={col: str for col in text_cols}, low_memory=False)
+
+
+def _categorize(df):
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        if col in TEXT_COLUMNS:
+            continue
+        unique = df[col].nunique(dropna=True)
+        if unique <= CATEGORY_MAX_UNIQUE and unique < CATEGORY_MAX_RATIO * len(df):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def _read_cached_frame(path):
+    try:
+        return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_pickle(path)
+    except Exception as e:
+        print(f"[!] Ignoring unreadable upload cache {path}: {e}")
+        return None
+
+
+def _write_cached_frame(df, base_path):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    try:
+        df.to_parquet(f"{base_path}.parquet")
+    except Exception:
+        # No parquet engine (or unsupported column types): fall back to pickle
+        df.to_pickle(f"{base_path}.pkl")
+
+
+def load_upload(uploaded_file, encoding="utf-8"):
+    """
+    Parse an uploaded CSV once per content hash. Returns (df, fingerprint).
+    Parsed frames are kept in memory and as Parquet under upload_cache/, so reruns
+    and re-uploads of the same bytes skip parsing entirely.
+    """
+    data = uploaded_file.getvalue()
+    fingerprint = fingerprint_bytes(data)
+    key = f"{fingerprint}-{encoding}"
+
+    with _cache_lock:
+        if key in _memory_cache:
+            return _memory_cache[key].copy(), fingerprint
+
+    base_path = os.path.join(CACHE_DIR, key)
+    df = None
+    for path in (f"{base_path}.parquet", f"{base_path}.pkl"):
+        if os.path.exists(path):
+            df = _read_cached_frame(path)
+            if df is not None:
+                break
+    if df is None:
+        df = _categorize(_parse_csv(data, encoding))
+        _write_cached_frame(df, base_path)
+
+    with _cache_lock:
+        _memory_cache[key] = df
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.pop(next(iter(_memory_cache)))
+    return df.copy(), fingerprint
+
+
+def remember_upload(state, key, uploaded_file, encoding="utf-8"):
+    """
+    load_upload for a page whose uploader can be reset by navigating away. The last frame is
+    kept in `state` (st.session_state) under key and returned while the uploader is empty.
+    Returns (df, fingerprint, file name), or None when nothing has been uploaded yet.
+    """
+    if uploaded_file is not None:
+        df, fingerprint = load_upload(uploaded_file, encoding=encoding)
+        state[key] = (df, fingerprint, uploaded_file.name)
+    elif key not in state:
+        return None
+    df, fingerprint, name = state[key]
+    return df.copy(), fingerprint, name